@@ -0,0 +1,77 @@
+"""
+Cold-boot benchmark: how long a fresh worker takes to import the app
+Each run uses a new interpreter so nothing is cached between runs
+
+Usage: python benchmark_startup.py [runs] [--max-ms N]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules that should only load on first use, never during boot
+HEAVY_MODULES = ["google.generativeai", "PyPDF2"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    "import_ms": elapsed_ms,
+    "routes": len(main.app.routes),
+    "heavy_loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+def run_once():
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def benchmark(runs: int = 5, max_ms: float = None):
+    print("=" * 60)
+    print("COLD-BOOT BENCHMARK")
+    print("=" * 60)
+
+    samples = []
+    heavy_loaded = set()
+    for i in range(runs):
+        sample = run_once()
+        samples.append(sample["import_ms"])
+        heavy_loaded.update(sample["heavy_loaded"])
+        print(f"Run {i + 1}: {sample['import_ms']:.0f} ms ({sample['routes']} routes)")
+
+    median_ms = statistics.median(samples)
+    print(f"\nMin: {min(samples):.0f} ms  Median: {median_ms:.0f} ms  Max: {max(samples):.0f} ms")
+
+    ok = True
+    if heavy_loaded:
+        print(f"❌ Heavy modules loaded at boot: {', '.join(sorted(heavy_loaded))}")
+        ok = False
+    else:
+        print("✅ No heavy AI/PDF modules loaded at boot")
+
+    if max_ms is not None and median_ms > max_ms:
+        print(f"❌ Median boot time {median_ms:.0f} ms exceeds budget of {max_ms:.0f} ms")
+        ok = False
+
+    return ok
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    max_ms = None
+    if "--max-ms" in args:
+        idx = args.index("--max-ms")
+        max_ms = float(args[idx + 1])
+        del args[idx:idx + 2]
+    runs = int(args[0]) if args else 5
+
+    sys.exit(0 if benchmark(runs, max_ms) else 1)
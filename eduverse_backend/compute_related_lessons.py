@@ -0,0 +1,44 @@
+"""
+Offline job: compute the related_lessons table (top-k TF-IDF neighbours per lesson)
+
+    python compute_related_lessons.py           # rebuild every lesson's list
+    python compute_related_lessons.py 12 40     # incremental update after lessons 12 and 40 changed
+
+Runs locally with NumPy/SciPy only; no network or embedding service is involved.
+The API keeps the table current after edits, so the full rebuild is only needed after
+seeding/imports done outside the ORM, and now and then to refresh the IDF weights.
+"""
+import sys
+import time
+from database import SessionLocal, engine
+from models.related_lesson import RelatedLesson
+from services import related_lessons
+
+def main(lesson_ids):
+    print("=" * 60)
+    print("COMPUTING RELATED LESSONS")
+    print("=" * 60)
+
+    RelatedLesson.__table__.create(bind=engine, checkfirst=True)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if lesson_ids:
+            print(f"Updating neighbours affected by lessons {', '.join(map(str, lesson_ids))}...")
+            count = related_lessons.update(db, lesson_ids)
+            print(f"✅ Rewrote {count} related-lesson lists")
+        else:
+            print(f"Rebuilding top-{related_lessons.RELATED_LESSONS_K} neighbours for every lesson...")
+            count = related_lessons.rebuild_all(db)
+            print(f"✅ Computed related lessons for {count} lessons")
+    finally:
+        db.close()
+
+    print(f"Took {time.perf_counter() - started:.1f}s")
+    print("\n" + "=" * 60)
+    print("DONE")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]])
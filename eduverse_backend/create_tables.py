@@ -1,5 +1,5 @@
 from database import engine, Base
-from models import user, course, lesson, quiz, progress, badge, chat_message, leaderboard, quiz_attempt
+import models  # noqa: F401 - registers every table on Base.metadata
 
 def create_tables():
     print("Creating database tables...")
@@ -0,0 +1,42 @@
+"""
+Conditional GET helpers: strong ETags, If-None-Match and Cache-Control
+"""
+import hashlib
+import json
+import os
+from fastapi import Request, Response
+
+# How long browsers/CDNs may reuse a catalog response before revalidating it
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "60"))
+
+
+def make_etag(data) -> str:
+    """Strong ETag from a hash of the canonical JSON form of the response data"""
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def conditional(request: Request, response: Response, etag: str, max_age: int = None):
+    """
+    Set ETag/Cache-Control on the response. Returns a 304 response when the client's
+    copy is current (return it from the route as is), otherwise None.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={CATALOG_MAX_AGE_SECONDS if max_age is None else max_age}, must-revalidate"
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
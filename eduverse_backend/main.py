@@ -1,6 +1,19 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from database import engine, async_engine, AsyncSessionLocal, READ_PRIMARY_HEADER, track_read_your_writes
+from pool_metrics import pool_status
+import query_stats
+from services.principal_cache import principal_cache
+from services import password_service, activity_buffer
+from services.availability import availability_index
+from services.catalog_cache import catalog_cache
+from services import search_service
+from services.search_index import local_index
+from services.title_suggest import title_suggester
+from services.related_lessons import recompute_queue
+from services.quiz_cache import quiz_cache
 from routes import (
     auth, 
     courses, 
@@ -14,11 +27,11 @@ from routes import (
     feedback_routes,
     resume_routes,
     assessment_routes,
-    games_routes
+    games_routes,
+    search_routes
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Schema changes run in the explicit migrate step (python create_tables.py), not at import time
 
 app = FastAPI(title="EduVerse API", version="1.0.0")
 
@@ -37,8 +50,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "ETag", READ_PRIMARY_HEADER],
 )
 
+# Per-request SQL query counting (X-DB-Query-Count / X-DB-Time-Ms headers)
+app.middleware("http")(query_stats.track_queries)
+
+# Read-your-writes across workers (X-Read-Primary header, see database.py)
+app.middleware("http")(track_read_your_writes)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(courses.router, prefix="/api/courses", tags=["Courses"])
@@ -55,6 +75,45 @@ app.include_router(feedback_routes.router, prefix="/api/feedback", tags=["User F
 app.include_router(resume_routes.router, prefix="/api/resume", tags=["Resume Analyzer"])
 app.include_router(assessment_routes.router, prefix="/api/assessment", tags=["Pre-Course Assessment"])
 app.include_router(games_routes.router, prefix="/api/games", tags=["Educational Games"])
+app.include_router(search_routes.router, prefix="/api/search", tags=["Search"])
+
+@app.on_event("startup")
+async def start_activity_buffer():
+    activity_buffer.start()
+
+@app.on_event("startup")
+async def build_availability_filter():
+    # Until this finishes (or if it fails) availability checks just query the database
+    try:
+        async with AsyncSessionLocal() as db:
+            await availability_index.build(db)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not build the availability Bloom filter")
+
+@app.on_event("startup")
+async def load_search_index():
+    # Maps the index file left by an earlier run, or builds it; searches would do it lazily otherwise
+    if search_service.engine_name() != "bm25":
+        return
+    try:
+        snapshot = await catalog_cache.aget()
+        await asyncio.to_thread(local_index.current, snapshot)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not load the search index")
+
+# Runs before the pools close so buffered activity is written on shutdown
+@app.on_event("shutdown")
+async def flush_activity_buffer():
+    await activity_buffer.stop()
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    await async_engine.dispose()
+    engine.dispose()
+
+@app.on_event("shutdown")
+def close_password_pool():
+    password_service.shutdown()
 
 @app.get("/")
 def read_root():
@@ -62,4 +121,70 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "version": "1.0.0"}
\ No newline at end of file
+    return {"status": "healthy", "version": "1.0.0"}
+
+@app.get("/health/db-pool")
+def db_pool_metrics():
+    """Live connection pool usage and checkout wait times for this worker"""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine)
+    }
+
+@app.get("/health/db-queries")
+def db_query_stats():
+    """SQL query counts and DB time per route for this worker"""
+    return {
+        "strict_budgets": query_stats.QUERY_BUDGET_STRICT,
+        "routes": query_stats.route_stats.snapshot()
+    }
+
+@app.get("/health/principal-cache")
+def principal_cache_stats():
+    """Hit rate of the authenticated-principal cache for this worker"""
+    return principal_cache.stats()
+
+@app.get("/health/password-hashing")
+def password_hashing_stats():
+    """Queue depth and wait times of the password-hashing process pool for this worker"""
+    return password_service.metrics.snapshot()
+
+
+@app.get("/health/activity-buffer")
+def activity_buffer_stats():
+    """Buffered last_activity/streak writes waiting for the next flush in this worker"""
+    return activity_buffer.activity_buffer.stats()
+
+
+@app.get("/health/availability-filter")
+def availability_filter_stats():
+    """Size and hit rate of the username/email Bloom filters for this worker"""
+    return availability_index.stats()
+
+
+@app.get("/health/catalog-cache")
+def catalog_cache_stats():
+    """Version, age and hit rate of the course/lesson catalog cache for this worker"""
+    return catalog_cache.stats()
+
+
+@app.get("/health/search-index")
+def search_index_stats():
+    """Search engine in use and size/build counts of the BM25 and title-suggest indexes for this worker"""
+    return {
+        "engine": search_service.engine_name(),
+        "bm25": local_index.stats(),
+        "suggest": title_suggester.stats()
+    }
+
+
+@app.get("/health/related-lessons")
+def related_lessons_stats():
+    """Lessons waiting for an incremental related-lessons recompute in this worker"""
+    return recompute_queue.stats()
+
+
+@app.get("/health/quiz-cache")
+def quiz_cache_stats():
+    """Size and hit rate of the pre-serialized quiz cache for this worker"""
+    return quiz_cache.stats()
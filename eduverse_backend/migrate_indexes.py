@@ -0,0 +1,88 @@
+"""
+Migration script to add the user-activity indexes to an existing database
+On PostgreSQL every index is built CONCURRENTLY so the tables stay writable during the build
+"""
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from database import engine, Base
+import models  # noqa: F401 - registers every table on Base.metadata
+
+INDEX_NAMES = [
+    "uq_lesson_progress_user_lesson",
+    "uq_progress_user_course",
+    "uq_user_badges_user_badge",
+    "ix_quiz_attempts_user_quiz_created",
+    "ix_game_scores_game_user_score",
+    "ix_game_scores_user_created",
+    "ix_chat_messages_user_created",
+    "ix_course_assessments_user_course_created",
+    "ix_feedbacks_user_created",
+    "ix_resume_analyses_user_created",
+    "ix_users_total_xp",
+    "ix_courses_search",
+    "ix_lessons_search",
+]
+
+# Full-text GIN indexes; other databases search through the BM25 index file instead
+POSTGRES_ONLY = {"ix_courses_search", "ix_lessons_search"}
+
+def find_index(name):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(name)
+
+def has_duplicates(conn, index):
+    """Check whether existing rows would violate a unique index"""
+    columns = ", ".join(column.name for column in index.columns)
+    result = conn.execute(text(
+        f"SELECT {columns} FROM {index.table.name} GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1"
+    ))
+    return result.first() is not None
+
+def drop_invalid_index(conn, name):
+    """Drop a leftover INVALID index from an interrupted concurrent build"""
+    invalid = conn.execute(text("""
+        SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).first()
+    if invalid:
+        print(f"   Dropping invalid index left by an earlier run: {name}")
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def migrate():
+    """Create the composite and user_id indexes"""
+
+    print("=" * 60)
+    print("BUILDING USER-ACTIVITY INDEXES")
+    print("=" * 60)
+
+    is_postgres = engine.dialect.name == "postgresql"
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in INDEX_NAMES:
+            index = find_index(name)
+
+            if name in POSTGRES_ONLY and not is_postgres:
+                print(f"Skipping {name}: PostgreSQL only")
+                continue
+
+            if index.unique and has_duplicates(conn, index):
+                print(f"⚠️  Skipping {name}: {index.table.name} has duplicate rows, clean them up and re-run")
+                continue
+
+            if is_postgres:
+                drop_invalid_index(conn, name)
+                index.dialect_options["postgresql"]["concurrently"] = True
+
+            print(f"Creating {name} on {index.table.name}...")
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+    print("\n" + "=" * 60)
+    print("MIGRATION COMPLETE")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,42 @@
+"""
+Migration script to add the section_index column to lessons and backfill it
+"""
+from sqlalchemy import bindparam, inspect, select, text, update
+from database import engine
+from models.lesson import Lesson
+from services.lesson_sections import build_section_index
+
+def migrate():
+    """Add section_index to lessons and index every existing lesson body"""
+
+    print("=" * 60)
+    print("MIGRATING LESSON SECTIONS")
+    print("=" * 60)
+
+    lessons = Lesson.__table__
+    columns = [column["name"] for column in inspect(engine).get_columns("lessons")]
+
+    with engine.begin() as conn:
+        if "section_index" in columns:
+            print("✅ Column 'section_index' already exists in lessons table")
+        else:
+            print("Adding 'section_index' column to lessons table...")
+            column_type = "JSON" if engine.dialect.name == "postgresql" else "TEXT"
+            conn.execute(text(f"ALTER TABLE lessons ADD COLUMN section_index {column_type}"))
+
+        rows = conn.execute(
+            select(lessons.c.id, lessons.c.content).where(lessons.c.section_index.is_(None))
+        ).all()
+        print(f"Indexing sections of {len(rows)} lessons...")
+        if rows:
+            conn.execute(
+                update(lessons).where(lessons.c.id == bindparam("lesson_id")),
+                [{"lesson_id": lesson_id, "section_index": build_section_index(content)} for lesson_id, content in rows]
+            )
+
+    print("\n" + "=" * 60)
+    print("MIGRATION COMPLETE")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    migrate()
@@ -11,6 +11,11 @@ from models.feedback import Feedback
 from models.resume_analysis import ResumeAnalysis
 from models.course_assessment import CourseAssessment
 from models.game_score import GameScore
+from models.revoked_token import RevokedToken
+from models.lesson_rendition import LessonRendition
+from models.related_lesson import RelatedLesson
+# GIN full-text indexes on courses/lessons (PostgreSQL only)
+from models.search import COURSE_SEARCH_DOCUMENT, LESSON_SEARCH_DOCUMENT
 
 __all__ = [
     "User",
@@ -29,5 +34,8 @@ __all__ = [
     "Feedback",
     "ResumeAnalysis",
     "CourseAssessment",
-    "GameScore"
+    "GameScore",
+    "RevokedToken",
+    "LessonRendition",
+    "RelatedLesson"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -6,6 +6,9 @@ from datetime import datetime
 class CourseAssessment(Base):
     """Pre-course assessment quiz to determine user's knowledge level"""
     __tablename__ = "course_assessments"
+    __table_args__ = (
+        Index("ix_course_assessments_user_course_created", "user_id", "course_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
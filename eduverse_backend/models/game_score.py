@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -6,6 +6,10 @@ from datetime import datetime
 class GameScore(Base):
     """Track user scores in educational games"""
     __tablename__ = "game_scores"
+    __table_args__ = (
+        Index("ix_game_scores_game_user_score", "game_name", "user_id", "score"),
+        Index("ix_game_scores_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import relationship, deferred, validates
 from database import Base
 from datetime import datetime
+from services.lesson_sections import build_section_index
 
 class Lesson(Base):
     __tablename__ = "lessons"
@@ -9,8 +10,10 @@ class Lesson(Base):
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
     title = Column(String, nullable=False)
-    content = Column(Text)
-    ai_summary = Column(Text)  # AI-generated summary of the lesson
+    # Heavy text columns load only on access (or with undefer_group("body"))
+    content = deferred(Column(Text), group="body")
+    ai_summary = deferred(Column(Text), group="body")  # AI-generated summary of the lesson
+    section_index = Column(JSON)  # "## " sections of content with byte offsets, kept in sync by set_content
     order = Column(Integer)
     video_url = Column(String)
     duration_minutes = Column(Integer)
@@ -20,4 +23,9 @@ class Lesson(Base):
     # Relationships
     course = relationship("Course", back_populates="lessons")
     quizzes = relationship("Quiz", back_populates="lesson", cascade="all, delete-orphan")
-    lesson_progress = relationship("LessonProgress", back_populates="lesson", cascade="all, delete-orphan")
\ No newline at end of file
+    lesson_progress = relationship("LessonProgress", back_populates="lesson", cascade="all, delete-orphan")
+    
+    @validates("content")
+    def set_content(self, key, content):
+        self.section_index = build_section_index(content)
+        return content
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, ForeignKey, DateTime
+from database import Base
+from datetime import datetime
+
+class LessonRendition(Base):
+    """Rendered HTML of a lesson plus pre-compressed copies, keyed by the hash of the markdown"""
+    __tablename__ = "lesson_renditions"
+    
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+    content_hash = Column(String, nullable=False)
+    html = Column(Text, nullable=False)
+    html_gzip = Column(LargeBinary, nullable=False)
+    html_brotli = Column(LargeBinary)  # NULL when brotli is not installed
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime, Float
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime, Float, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        Index("uq_progress_user_course", "user_id", "course_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -20,6 +23,9 @@ class Progress(Base):
 
 class LessonProgress(Base):
     __tablename__ = "lesson_progress"
+    __table_args__ = (
+        Index("uq_lesson_progress_user_lesson", "user_id", "lesson_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
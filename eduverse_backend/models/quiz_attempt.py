@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, JSON
+from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        Index("ix_quiz_attempts_user_quiz_created", "user_id", "quiz_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from database import Base
+from datetime import datetime
+
+class RelatedLesson(Base):
+    """Precomputed top-k TF-IDF neighbours of a lesson (rank 1 = most similar)"""
+    __tablename__ = "related_lessons"
+
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, nullable=False)  # cosine similarity
+    computed_at = Column(DateTime, default=datetime.utcnow)
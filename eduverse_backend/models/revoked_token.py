@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, DateTime
+from database import Base
+
+class RevokedToken(Base):
+    """Revoked refresh-token ids (jti) and families ("family:<id>"), kept only until they expire"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
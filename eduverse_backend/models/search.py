@@ -0,0 +1,53 @@
+"""
+PostgreSQL full-text search documents for courses and lessons
+
+Each document is a weighted tsvector expression with a GIN expression index over the exact
+same expression, so `document @@ query` is answered from the index. The indexes are only
+created on PostgreSQL; other databases use the BM25 index in services/search_index.py.
+"""
+from sqlalchemy import Index, func, text
+from sqlalchemy.dialects import postgresql  # noqa: F401 - registers the typed to_tsvector/websearch_to_tsquery
+from models.course import Course
+from models.lesson import Lesson
+
+# Inlined (not bound) so queries render the same SQL text as the index expressions
+SEARCH_CONFIG = text("'english'")
+
+
+def weighted_document(*weighted_columns):
+    """setweight(to_tsvector(col), weight) || ... for (column, weight) pairs"""
+    document = None
+    for column, weight in weighted_columns:
+        part = func.setweight(
+            func.to_tsvector(SEARCH_CONFIG, func.coalesce(column, text("''"))),
+            text(f"'{weight}'")
+        )
+        document = part if document is None else document.op("||")(part)
+    return document
+
+
+def search_query(user_input: str):
+    """Parse user input with websearch syntax ("quoted phrases", -exclusions, or)"""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, user_input)
+
+
+def matches(document, query):
+    return document.op("@@", is_comparison=True)(query)
+
+
+_courses = Course.__table__.c
+_lessons = Lesson.__table__.c
+
+COURSE_SEARCH_DOCUMENT = weighted_document(
+    (_courses.title, "A"),
+    (_courses.description, "B"),
+    (_courses.category, "C"),
+    (_courses.difficulty, "C")
+)
+LESSON_SEARCH_DOCUMENT = weighted_document(
+    (_lessons.title, "A"),
+    (_lessons.content, "B")
+)
+
+Index("ix_courses_search", COURSE_SEARCH_DOCUMENT, postgresql_using="gin").ddl_if(dialect="postgresql")
+Index("ix_lessons_search", LESSON_SEARCH_DOCUMENT, postgresql_using="gin").ddl_if(dialect="postgresql")
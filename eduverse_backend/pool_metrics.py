@@ -0,0 +1,99 @@
+"""
+Connection pool instrumentation: checkout wait-time histograms and live pool status
+"""
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds (ms) of the checkout wait-time buckets; anything slower lands in "le_inf"
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class WaitHistogram:
+    """Cumulative histogram of how long callers waited for a pooled connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+        self._timeouts = 0
+
+    def observe(self, wait_ms: float, timed_out: bool = False):
+        idx = len(WAIT_BUCKETS_MS)
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                idx = i
+                break
+        with self._lock:
+            self._counts[idx] += 1
+            self._total_ms += wait_ms
+            self._max_ms = max(self._max_ms, wait_ms)
+            if timed_out:
+                self._timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total_ms, max_ms, timeouts = self._total_ms, self._max_ms, self._timeouts
+        checkouts = sum(counts)
+        labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["le_inf"]
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "avg_wait_ms": round(total_ms / checkouts, 3) if checkouts else 0.0,
+            "max_wait_ms": round(max_ms, 3),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class _TimedCheckoutMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_histogram.observe((time.perf_counter() - start) * 1000, timed_out)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool that records checkout wait times"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times"""
+
+
+def pool_status(engine) -> dict:
+    """Report checked-out, idle and overflow connections plus the wait histogram for an engine"""
+
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # QueuePool.overflow() goes negative while the base pool is not yet full
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    else:
+        status["status"] = pool.status()
+
+    histogram = getattr(pool, "wait_histogram", None)
+    if histogram is not None:
+        status["wait_time"] = histogram.snapshot()
+
+    return status
@@ -0,0 +1,126 @@
+"""
+Per-request SQL instrumentation: query counts, DB time, per-route stats and query budgets
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# When enabled, a route that runs more queries than its declared budget fails the request
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+_current = ContextVar("request_query_stats", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a route runs more SQL queries than its budget"""
+
+
+class RequestQueryStats:
+    __slots__ = ("count", "db_time_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time_ms = 0.0
+
+
+class RouteQueryStats:
+    """Aggregated query counts per route template"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, stats: RequestQueryStats, budget: int = None):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "total_queries": 0,
+                    "max_queries": 0,
+                    "total_db_time_ms": 0.0,
+                    "budget": budget,
+                    "budget_violations": 0
+                }
+            entry["requests"] += 1
+            entry["total_queries"] += stats.count
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            entry["total_db_time_ms"] += stats.db_time_ms
+            if budget is not None and stats.count > budget:
+                entry["budget_violations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {route: dict(entry) for route, entry in self._routes.items()}
+        for entry in routes.values():
+            entry["avg_queries"] = round(entry["total_queries"] / entry["requests"], 2)
+            entry["avg_db_time_ms"] = round(entry["total_db_time_ms"] / entry["requests"], 3)
+            entry["total_db_time_ms"] = round(entry["total_db_time_ms"], 3)
+        return routes
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteQueryStats()
+
+
+def query_budget(max_queries: Optional[int]):
+    """Declare the maximum number of SQL queries a route may run per request (None: no budget)"""
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context.query_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    start = getattr(context, "query_start_time", None)
+    if start is not None:
+        stats.db_time_ms += (time.perf_counter() - start) * 1000
+
+
+async def track_queries(request, call_next):
+    """HTTP middleware: count the queries a request runs and report them in response headers"""
+
+    stats = RequestQueryStats()
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    route = request.scope.get("route")
+    endpoint = request.scope.get("endpoint")
+    budget = getattr(endpoint, "query_budget", None)
+    if route is not None:
+        route_stats.record(f"{request.method} {route.path}", stats, budget)
+
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.db_time_ms:.2f}"
+
+    if budget is not None and stats.count > budget:
+        message = f"{request.method} {request.url.path} ran {stats.count} SQL queries (budget {budget})"
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    return response
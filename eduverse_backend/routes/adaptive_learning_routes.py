@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
 from models.quiz_attempt import QuizAttempt
 from models.lesson import Lesson
+from schemas.lesson_schema import LessonOutline
 from routes.auth import get_current_user
 from services.adaptive_learning_service import get_personalized_recommendations
 
@@ -11,13 +14,15 @@ router = APIRouter()
 
 @router.get("/recommendations")
 async def get_recommendations(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # Get user's quiz performance
-    quiz_attempts = db.query(QuizAttempt).filter(
-        QuizAttempt.user_id == current_user.id
-    ).order_by(QuizAttempt.created_at.desc()).limit(10).all()
+    quiz_attempts = (await db.scalars(
+        select(QuizAttempt).where(
+            QuizAttempt.user_id == current_user.id
+        ).order_by(QuizAttempt.created_at.desc()).limit(10)
+    )).all()
     
     # Get recommendations
     recommendations = await get_personalized_recommendations(
@@ -57,6 +62,6 @@ def get_learning_path(
     return {
         "current_level": difficulty,
         "average_score": avg_score,
-        "recommended_lessons": recommended_lessons,
+        "recommended_lessons": [LessonOutline.model_validate(lesson) for lesson in recommended_lessons],
         "total_attempts": len(quiz_attempts)
     }
\ No newline at end of file
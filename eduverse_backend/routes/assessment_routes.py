@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
 from models.course import Course
 from models.lesson import Lesson
 from models.course_assessment import CourseAssessment
 from schemas.assessment import AssessmentSubmit, AssessmentResponse
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
+from services.gamification_service import award_xp
 from services.ai_quiz_service import generate_adaptive_recommendations, generate_quiz_questions
 from typing import List
 
@@ -15,13 +18,13 @@ router = APIRouter()
 @router.get("/course/{course_id}/questions")
 async def get_assessment_questions(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Generate assessment questions for a course"""
     
     # Get course
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.get(Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
@@ -176,13 +179,13 @@ async def get_assessment_questions(
 @router.post("/submit")
 async def submit_assessment(
     assessment_data: AssessmentSubmit,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Submit course assessment and get AI recommendations"""
     
     # Get course
-    course = db.query(Course).filter(Course.id == assessment_data.course_id).first()
+    course = await db.get(Course, assessment_data.course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
@@ -198,7 +201,9 @@ async def submit_assessment(
     score_percentage = (correct_count / total_questions) * 100
     
     # Get course lessons
-    lessons = db.query(Lesson).filter(Lesson.course_id == course.id).order_by(Lesson.order).all()
+    lessons = (await db.scalars(
+        select(Lesson).where(Lesson.course_id == course.id).order_by(Lesson.order)
+    )).all()
     
     # Identify weak areas (simplified)
     weak_areas = []
@@ -243,13 +248,10 @@ async def submit_assessment(
     )
     
     db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
     
     # Award XP for taking assessment
-    current_user.total_xp += 50
-    current_user.level = (current_user.total_xp // 1000) + 1
-    db.commit()
+    await db.run_sync(award_xp, current_user.id, 50)
+    await db.commit()
     
     # Format response for frontend
     recommendations = [
@@ -280,7 +282,7 @@ async def submit_assessment(
 @router.get("/course/{course_id}/my-assessment", response_model=AssessmentResponse)
 def get_my_assessment(
     course_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's latest assessment for a course"""
@@ -297,7 +299,7 @@ def get_my_assessment(
 
 @router.get("/my-assessments", response_model=List[AssessmentResponse])
 def get_all_my_assessments(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all assessments for current user"""
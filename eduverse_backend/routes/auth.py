@@ -1,31 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db, read_session_for, READ_PRIMARY_HEADER
 from models.user import User
-from schemas.user_schema import UserCreate, UserLogin, Token, UserResponse
-from passlib.context import CryptContext
+from schemas.user_schema import UserCreate, UserLogin, Token, UserResponse, RefreshRequest
+from services.principal_cache import principal_cache, attach as attach_principal, snapshot as snapshot_principal
+from services import password_service, activity_buffer
+from services.user_provisioning import provision_users
+from services.availability import availability_index, is_taken
+from services.refresh_tokens import RefreshTokenError, create_refresh_token, decode_refresh_token, rotate, revoke_family
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer
 import os
+import secrets
 from dotenv import load_dotenv
 
 load_dotenv()
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# Shared secret for bulk provisioning and course import/export; those endpoints are disabled when unset
+PROVISIONING_API_KEY = os.getenv("PROVISIONING_API_KEY")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -34,7 +38,7 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -42,30 +46,47 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
+    if payload.get("type") == "refresh":
+        # Refresh tokens only work at /refresh, never as a bearer token
+        raise credentials_exception
+    
+    # Cached principal: attach it to this session without a round-trip
+    cached = principal_cache.get(user_id, token)
+    if cached is not None:
+        return attach_principal(db, cached)
     
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
+    
+    values = snapshot_principal(user)
+    if values is not None:
+        principal_cache.put(user_id, token, values)
     return user
 
+def get_user_read_db(request: Request, current_user: User = Depends(get_current_user)):
+    """Read-only session for the current user's own data (replica unless they just wrote)"""
+    db = read_session_for(current_user.id, request.headers.get(READ_PRIMARY_HEADER))
+    try:
+        yield db
+    finally:
+        db.close()
+
 @router.post("/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if user exists
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Check if user exists (the Bloom filter skips the lookups for names that are definitely free)
+    await availability_index.refresh(db)
+    if await is_taken(db, "username", user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    if await is_taken(db, "email", user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user (bcrypt runs on the password-hashing process pool)
+    hashed_password = await password_service.hash_password(user.password)
     new_user = User(
         username=user.username,
         email=user.email,
@@ -73,8 +94,14 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         full_name=user.full_name
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Taken by a registration this worker's filter has not seen yet
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username or email already registered")
+    await db.refresh(new_user)
+    availability_index.add(new_user.username, new_user.email)
     
     # Create access token
     access_token = create_access_token(data={"sub": str(new_user.id)})
@@ -82,30 +109,111 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "refresh_token": create_refresh_token(new_user.id),
         "user": new_user
     }
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(User).where(User.username == user.username))).scalars().first()
+    is_valid, new_hash = False, None
+    if db_user:
+        is_valid, new_hash = await password_service.verify_password(user.password, db_user.hashed_password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
     
-    # Update last activity
-    db_user.last_activity = datetime.utcnow()
-    db.commit()
+    # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+    
+    # Update last activity (buffered, no commit on the login path)
+    activity_buffer.touch(db_user.id)
     
     access_token = create_access_token(data={"sub": str(db_user.id)})
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
+        "refresh_token": create_refresh_token(db_user.id),
         "user": db_user
     }
 
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Swap a refresh token for a new access/refresh pair (no password check)"""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        user_id, family = await rotate(db, request.refresh_token)
+    except RefreshTokenError:
+        raise invalid_token
+    
+    db_user = await db.get(User, user_id)
+    if db_user is None:
+        raise invalid_token
+    
+    return {
+        "access_token": create_access_token(data={"sub": str(db_user.id)}),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(db_user.id, family=family),
+        "user": db_user
+    }
+
+@router.post("/logout")
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke the refresh token and every token rotated from the same login"""
+    try:
+        payload = decode_refresh_token(request.refresh_token)
+    except RefreshTokenError:
+        # Already unusable; nothing to revoke
+        return {"message": "Logged out"}
+    
+    await revoke_family(db, payload["fam"])
+    return {"message": "Logged out"}
+
+@router.get("/availability")
+async def check_availability(username: str = None, email: str = None, db: AsyncSession = Depends(get_async_db)):
+    """Check whether a username and/or email is still free (for live signup validation)"""
+    if username is None and email is None:
+        raise HTTPException(status_code=400, detail="Provide a username or an email")
+    
+    await availability_index.refresh(db)
+    result = {}
+    if username is not None:
+        result["username_available"] = not await is_taken(db, "username", username)
+    if email is not None:
+        result["email_available"] = not await is_taken(db, "email", email)
+    return result
+
+def require_provisioning_key(x_provisioning_key: str = Header(None)):
+    """Gate for bulk admin endpoints (user provisioning, course import/export)"""
+    if not PROVISIONING_API_KEY:
+        raise HTTPException(status_code=403, detail="Bulk provisioning is disabled")
+    if not x_provisioning_key or not secrets.compare_digest(x_provisioning_key, PROVISIONING_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid provisioning key")
+
+@router.post("/provision", dependencies=[Depends(require_provisioning_key)])
+async def provision(request: Request):
+    """
+    Bulk-create a cohort of users from a CSV (username,email,password,full_name header)
+    or NDJSON upload. Streams back one JSON result line per row, then a summary line.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    # Read the upload before responding: once a StreamingResponse starts, its disconnect
+    # listener owns the receive channel
+    chunks = [chunk async for chunk in request.stream()]
+    return StreamingResponse(
+        provision_users(chunks, is_csv),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
\ No newline at end of file
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db, mark_recent_write
 from models.chat_message import ChatMessage
 from models.user import User
-from models.lesson import Lesson
 from schemas.chat import ChatRequest, ChatResponse
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
 from services.ai_chatbot_service import get_ai_response
+from services.catalog_cache import catalog_cache
+from services.lesson_sections import most_relevant_section
+from query_stats import query_budget
 from typing import List
 
 router = APIRouter()
@@ -14,15 +17,19 @@ router = APIRouter()
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Fetch lesson content if lesson_id is provided
+    # Lesson content comes from the catalog cache, not a query per message;
+    # send the section that matches the question rather than the start of the lesson
     lesson_content = None
     if request.lesson_id:
-        lesson = db.query(Lesson).filter(Lesson.id == request.lesson_id).first()
-        if lesson:
-            lesson_content = lesson.content
+        catalog = await catalog_cache.aget()
+        lesson = catalog.lessons.get(request.lesson_id)
+        if lesson and lesson["content"]:
+            lesson_content = most_relevant_section(
+                lesson["content"], catalog.sections(request.lesson_id), request.message
+            ) or lesson["content"]
     
     # Get AI response with lesson content
     ai_response = await get_ai_response(request.message, request.context, lesson_content)
@@ -35,15 +42,15 @@ async def chat(
         context=request.context
     )
     db.add(chat_message)
-    db.commit()
-    db.refresh(chat_message)
+    await db.commit()
     
     return chat_message
 
 @router.get("/history", response_model=List[ChatResponse])
+@query_budget(2)
 def get_chat_history(
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     messages = db.query(ChatMessage).filter(
@@ -59,4 +66,6 @@ def clear_chat_history(
 ):
     db.query(ChatMessage).filter(ChatMessage.user_id == current_user.id).delete()
     db.commit()
+    # Bulk deletes bypass the flush hooks, so pin this user's reads to the primary explicitly
+    mark_recent_write(current_user.id)
     return {"message": "Chat history cleared successfully"}
\ No newline at end of file
@@ -1,24 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from database import get_db
 from models.course import Course
-from schemas.course import CourseCreate, CourseResponse
+from schemas.course import CourseCreate, CourseResponse, CourseImportSummary
+from services.catalog_cache import catalog_cache
+from services.course_transfer import CourseImportError, export_course, import_course
+from routes.auth import require_provisioning_key
+from query_stats import query_budget
+from http_cache import conditional
 from typing import List
 
 router = APIRouter()
 
+# Catalog reads come from the in-process cache; 2 queries only when it reloads
 @router.get("/", response_model=List[CourseResponse])
-def get_courses(db: Session = Depends(get_db)):
-    courses = db.query(Course).all()
-    return courses
+@query_budget(2)
+def get_courses(request: Request, response: Response):
+    catalog = catalog_cache.get()
+    not_modified = conditional(request, response, catalog.etag("courses", catalog.course_list))
+    if not_modified:
+        return not_modified
+    return catalog.course_list()
 
 @router.get("/{course_id}", response_model=CourseResponse)
-def get_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
+@query_budget(2)
+def get_course(course_id: int, request: Request, response: Response):
+    catalog = catalog_cache.get()
+    course = catalog.courses.get(course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
+    not_modified = conditional(request, response, catalog.etag(("course", course_id), lambda: course))
+    if not_modified:
+        return not_modified
     return course
 
+@router.get("/{course_id}/export", dependencies=[Depends(require_provisioning_key)])
+def export_course_tree(course_id: int):
+    """Stream the course, its lessons, quizzes, questions and options, and all badges as NDJSON"""
+    if course_id not in catalog_cache.get().courses:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return StreamingResponse(
+        export_course(course_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="course-{course_id}.ndjson"'}
+    )
+
+@router.post("/import", response_model=CourseImportSummary, dependencies=[Depends(require_provisioning_key)])
+async def import_course_tree(request: Request):
+    """Create a new course from an export stream; nothing is written unless every line imports"""
+    try:
+        return await import_course(request.stream())
+    except CourseImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=CourseResponse)
 def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     new_course = Course(**course.dict())
@@ -4,7 +4,7 @@ from database import get_db
 from models.user import User
 from models.feedback import Feedback
 from schemas.feedback import FeedbackCreate, FeedbackResponse
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
 from typing import List
 
 router = APIRouter()
@@ -44,7 +44,7 @@ def submit_feedback(
 
 @router.get("/my-feedback", response_model=List[FeedbackResponse])
 def get_my_feedback(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all feedback submitted by current user"""
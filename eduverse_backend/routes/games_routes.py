@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.orm import Session, joinedload
+from database import get_db, get_read_db
 from models.user import User
 from models.game_score import GameScore
 from schemas.game import GameScoreSubmit, GameScoreResponse, GameLeaderboardEntry
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
+from services.gamification_service import award_xp
+from query_stats import query_budget
 from typing import List
 
 router = APIRouter()
@@ -109,8 +111,7 @@ def submit_game_score(
     db.add(game_score)
     
     # Award XP to user
-    current_user.total_xp += xp_earned
-    current_user.level = (current_user.total_xp // 1000) + 1
+    award_xp(db, current_user.id, xp_earned)
     
     db.commit()
     db.refresh(game_score)
@@ -121,7 +122,7 @@ def submit_game_score(
 def get_my_scores(
     game_name: str = None,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's game scores"""
@@ -136,10 +137,11 @@ def get_my_scores(
     return scores
 
 @router.get("/leaderboard/{game_name}", response_model=List[GameLeaderboardEntry])
+@query_budget(1)
 def get_game_leaderboard(
     game_name: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get leaderboard for a specific game"""
     
@@ -158,7 +160,7 @@ def get_game_leaderboard(
     ).group_by(GameScore.user_id).subquery()
     
     # Get full records for best scores
-    top_scores = db.query(GameScore).join(
+    top_scores = db.query(GameScore).options(joinedload(GameScore.user)).join(
         subquery,
         (GameScore.user_id == subquery.c.user_id) & 
         (GameScore.score == subquery.c.best_score)
@@ -1,22 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_read_db
 from models.user import User
 from models.badge import Badge, UserBadge
 from models.leaderboard import Leaderboard
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
+from services.gamification_service import award_xp
+from query_stats import query_budget
 from typing import List
 
 router = APIRouter()
 
 @router.get("/badges")
-def get_all_badges(db: Session = Depends(get_db)):
+def get_all_badges(db: Session = Depends(get_read_db)):
     badges = db.query(Badge).all()
     return badges
 
 @router.get("/badges/user")
 def get_user_badges(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     user_badges = db.query(UserBadge).filter(
@@ -49,8 +51,7 @@ def award_badge(
     db.add(user_badge)
     
     # Award XP
-    current_user.total_xp += badge.xp_reward
-    current_user.level = (current_user.total_xp // 1000) + 1
+    award_xp(db, current_user.id, badge.xp_reward)
     
     db.commit()
     db.refresh(user_badge)
@@ -58,7 +59,8 @@ def award_badge(
     return {"message": "Badge awarded successfully", "badge": badge, "xp_earned": badge.xp_reward}
 
 @router.get("/leaderboard")
-def get_leaderboard(limit: int = 10, db: Session = Depends(get_db)):
+@query_budget(1)
+def get_leaderboard(limit: int = 10, db: Session = Depends(get_read_db)):
     users = db.query(User).order_by(User.total_xp.desc()).limit(limit).all()
     
     leaderboard = []
@@ -1,29 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy import select
+from database import get_db, get_async_db, get_read_db
 from models.lesson import Lesson
-from schemas.lesson_schema import LessonCreate, LessonResponse
+from models.related_lesson import RelatedLesson
+from schemas.lesson_schema import (
+    LessonCreate, LessonResponse, LessonOutline, LessonSections, LessonSectionContent, RelatedLessonResponse
+)
 from services.lesson_summarizer_service import generate_lesson_summary
+from services.catalog_cache import catalog_cache, OUTLINE_FIELDS
+from services.lesson_sections import section_text
+from services.lesson_renderer import get_rendition, choose_encoding, regenerate as regenerate_rendition
+from query_stats import query_budget
+from http_cache import conditional, make_etag
 from typing import List
 
 router = APIRouter()
 
+# Catalog reads come from the in-process cache; 2 queries only when it reloads
 @router.get("/course/{course_id}", response_model=List[LessonResponse])
-def get_lessons_by_course(course_id: int, db: Session = Depends(get_db)):
-    lessons = db.query(Lesson).filter(Lesson.course_id == course_id).order_by(Lesson.order).all()
+@query_budget(2)
+def get_lessons_by_course(course_id: int, request: Request, response: Response):
+    catalog = catalog_cache.get()
+    lessons = catalog.lessons_by_course.get(course_id, [])
+    not_modified = conditional(request, response, catalog.etag(("course_lessons", course_id), lambda: lessons))
+    if not_modified:
+        return not_modified
     return lessons
 
+@router.get("/course/{course_id}/outline", response_model=List[LessonOutline])
+@query_budget(2)
+def get_course_outline(course_id: int, request: Request, response: Response):
+    """Lesson titles/order/duration/XP of a course without the lesson bodies"""
+    catalog = catalog_cache.get()
+    outline = catalog.outline(course_id)
+    not_modified = conditional(request, response, catalog.etag(("outline", course_id), lambda: outline))
+    if not_modified:
+        return not_modified
+    return outline
+
 @router.get("/{lesson_id}", response_model=LessonResponse)
-def get_lesson(lesson_id: int, db: Session = Depends(get_db)):
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+@query_budget(2)
+def get_lesson(lesson_id: int, request: Request, response: Response, include_content: bool = True):
+    """A lesson; include_content=false leaves out the markdown body (pages that show /rendered)"""
+    catalog = catalog_cache.get()
+    lesson = catalog.lessons.get(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
+    if not include_content:
+        lesson = {**lesson, "content": None}
+    not_modified = conditional(request, response, catalog.etag(("lesson", lesson_id, include_content), lambda: lesson))
+    if not_modified:
+        return not_modified
     return lesson
 
+@router.get("/{lesson_id}/sections", response_model=LessonSections)
+@query_budget(2)
+def get_lesson_sections(lesson_id: int, request: Request, response: Response):
+    """Table of contents of a lesson, for loading one section at a time"""
+    catalog = catalog_cache.get()
+    lesson = catalog.lessons.get(lesson_id)
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    
+    toc = {
+        "lesson_id": lesson_id,
+        "title": lesson["title"],
+        "sections": [
+            {
+                "index": section["index"],
+                "heading": section["heading"],
+                "anchor": section["anchor"],
+                "bytes": section["end"] - section["start"]
+            }
+            for section in catalog.sections(lesson_id)
+        ]
+    }
+    not_modified = conditional(request, response, catalog.etag(("sections", lesson_id), lambda: toc))
+    if not_modified:
+        return not_modified
+    return toc
+
+@router.get("/{lesson_id}/sections/{index}", response_model=LessonSectionContent)
+@query_budget(2)
+def get_lesson_section(lesson_id: int, index: int, request: Request, response: Response):
+    """A single section of a lesson's markdown"""
+    catalog = catalog_cache.get()
+    lesson = catalog.lessons.get(lesson_id)
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    
+    sections = catalog.sections(lesson_id)
+    if not 0 <= index < len(sections):
+        raise HTTPException(status_code=404, detail="Section not found")
+    
+    section = sections[index]
+    not_modified = conditional(request, response, catalog.etag(("section", lesson_id, index), lambda: section))
+    if not_modified:
+        return not_modified
+    return {
+        "lesson_id": lesson_id,
+        "index": index,
+        "heading": section["heading"],
+        "anchor": section["anchor"],
+        "content": section_text(lesson["content"], section),
+        "total_sections": len(sections)
+    }
+
+# 4 queries only on a cold render (catalog load + storing the rendition); 0 when cached
+@router.get("/{lesson_id}/rendered")
+@query_budget(4)
+def get_rendered_lesson(lesson_id: int, request: Request):
+    """Lesson body as pre-rendered HTML, pre-compressed to match Accept-Encoding"""
+    lesson = catalog_cache.get().lessons.get(lesson_id)
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    
+    rendition = get_rendition(lesson_id, lesson["content"])
+    encoding = choose_encoding(request.headers.get("accept-encoding"), rendition)
+    
+    response = Response(content=getattr(rendition, encoding), media_type="text/html; charset=utf-8")
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    
+    # Each encoding is its own representation, so each gets its own strong ETag
+    not_modified = conditional(request, response, f'"{rendition.content_hash[:32]}-{encoding}"')
+    if not_modified:
+        not_modified.headers["Vary"] = "Accept-Encoding"
+        return not_modified
+    return response
+
+# Catalog reload (2) + the precomputed neighbours (1)
+@router.get("/{lesson_id}/related", response_model=List[RelatedLessonResponse])
+@query_budget(3)
+def get_related_lessons(lesson_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    """The most similar lessons across all courses (TF-IDF, precomputed in related_lessons)"""
+    catalog = catalog_cache.get()
+    if lesson_id not in catalog.lessons:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    
+    rows = db.execute(
+        select(RelatedLesson.related_lesson_id, RelatedLesson.score)
+        .where(RelatedLesson.lesson_id == lesson_id)
+        .order_by(RelatedLesson.rank)
+    ).all()
+    related = []
+    for related_id, score in rows:
+        lesson = catalog.lessons.get(related_id)
+        if lesson is None:
+            continue
+        course = catalog.courses.get(lesson["course_id"])
+        related.append({
+            **{field: lesson[field] for field in OUTLINE_FIELDS},
+            "course_title": course["title"] if course else None,
+            "score": round(score, 4)
+        })
+    
+    not_modified = conditional(request, response, make_etag(related))
+    if not_modified:
+        return not_modified
+    return related
+
 @router.post("/", response_model=LessonResponse)
 def create_lesson(lesson: LessonCreate, db: Session = Depends(get_db)):
     new_lesson = Lesson(**lesson.dict())
     db.add(new_lesson)
+    db.flush()
+    regenerate_rendition(db, new_lesson)
     db.commit()
     db.refresh(new_lesson)
     return new_lesson
@@ -37,6 +182,7 @@ def update_lesson(lesson_id: int, lesson: LessonCreate, db: Session = Depends(ge
     for key, value in lesson.dict().items():
         setattr(db_lesson, key, value)
     
+    regenerate_rendition(db, db_lesson)
     db.commit()
     db.refresh(db_lesson)
     return db_lesson
@@ -52,10 +198,10 @@ def delete_lesson(lesson_id: int, db: Session = Depends(get_db)):
     return {"message": "Lesson deleted successfully"}
 
 @router.post("/{lesson_id}/generate-summary")
-async def generate_summary(lesson_id: int, db: Session = Depends(get_db)):
+async def generate_summary(lesson_id: int, db: AsyncSession = Depends(get_async_db)):
     """Generate AI summary for a lesson"""
     
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    lesson = await db.get(Lesson, lesson_id, options=[undefer_group("body")])
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
@@ -64,8 +210,7 @@ async def generate_summary(lesson_id: int, db: Session = Depends(get_db)):
     
     # Update lesson with summary
     lesson.ai_summary = summary
-    db.commit()
-    db.refresh(lesson)
+    await db.commit()
     
     return {
         "message": "Summary generated successfully",
@@ -73,21 +218,28 @@ async def generate_summary(lesson_id: int, db: Session = Depends(get_db)):
     }
 
 @router.get("/{lesson_id}/summary")
-def get_lesson_summary(lesson_id: int, db: Session = Depends(get_db)):
+@query_budget(2)
+def get_lesson_summary(lesson_id: int, request: Request, response: Response):
     """Get AI summary for a lesson"""
     
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    catalog = catalog_cache.get()
+    lesson = catalog.lessons.get(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
-    if not lesson.ai_summary:
-        return {
+    if not lesson["ai_summary"]:
+        summary = {
             "message": "Summary not yet generated",
             "summary": None
         }
+    else:
+        summary = {
+            "lesson_id": lesson["id"],
+            "lesson_title": lesson["title"],
+            "summary": lesson["ai_summary"]
+        }
     
-    return {
-        "lesson_id": lesson.id,
-        "lesson_title": lesson.title,
-        "summary": lesson.ai_summary
-    }
\ No newline at end of file
+    not_modified = conditional(request, response, catalog.etag(("summary", lesson_id), lambda: summary))
+    if not_modified:
+        return not_modified
+    return summary
\ No newline at end of file
@@ -1,35 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from database import get_db
 from models.progress import Progress, LessonProgress
 from models.user import User
 from models.lesson import Lesson
 from schemas.progress import ProgressResponse, LessonProgressCreate, LessonProgressResponse
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
+from services.gamification_service import award_xp
 from typing import List
 from datetime import datetime
 
 router = APIRouter()
 
+def _get_or_create(db: Session, model, **keys):
+    """The row with keys (unique per user), inserting and committing it if there is none"""
+    row = db.query(model).filter_by(**keys).first()
+    if row is not None:
+        return row
+    row = model(**keys)
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request (double-click, repeated effect) inserted it first
+        db.rollback()
+        row = db.query(model).filter_by(**keys).first()
+        if row is None:
+            raise
+    return row
+
 @router.get("/course/{course_id}", response_model=ProgressResponse)
 def get_course_progress(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    progress = db.query(Progress).filter(
-        Progress.user_id == current_user.id,
-        Progress.course_id == course_id
-    ).first()
-    
-    if not progress:
-        # Create new progress
-        progress = Progress(user_id=current_user.id, course_id=course_id)
-        db.add(progress)
-        db.commit()
-        db.refresh(progress)
-    
-    return progress
+    return _get_or_create(db, Progress, user_id=current_user.id, course_id=course_id)
 
 @router.post("/lesson/complete", response_model=LessonProgressResponse)
 def complete_lesson(
@@ -37,43 +44,17 @@ def complete_lesson(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Check if already completed
-    existing = db.query(LessonProgress).filter(
-        LessonProgress.user_id == current_user.id,
-        LessonProgress.lesson_id == lesson_progress.lesson_id
-    ).first()
-    
-    if existing:
-        existing.is_completed = True
-        existing.completed_at = datetime.utcnow()
-        existing.time_spent_minutes += lesson_progress.time_spent_minutes
-        db.commit()
-        db.refresh(existing)
-        lesson_prog = existing
-    else:
-        new_progress = LessonProgress(
-            user_id=current_user.id,
-            lesson_id=lesson_progress.lesson_id,
-            is_completed=True,
-            time_spent_minutes=lesson_progress.time_spent_minutes,
-            completed_at=datetime.utcnow()
-        )
-        db.add(new_progress)
-        db.commit()
-        db.refresh(new_progress)
-        lesson_prog = new_progress
+    lesson_prog = _get_or_create(db, LessonProgress, user_id=current_user.id, lesson_id=lesson_progress.lesson_id)
+    lesson_prog.is_completed = True
+    lesson_prog.completed_at = datetime.utcnow()
+    lesson_prog.time_spent_minutes = (lesson_prog.time_spent_minutes or 0) + lesson_progress.time_spent_minutes
+    db.commit()
+    db.refresh(lesson_prog)
     
     # Update course progress
     lesson = db.query(Lesson).filter(Lesson.id == lesson_progress.lesson_id).first()
     if lesson:
-        course_progress = db.query(Progress).filter(
-            Progress.user_id == current_user.id,
-            Progress.course_id == lesson.course_id
-        ).first()
-        
-        if not course_progress:
-            course_progress = Progress(user_id=current_user.id, course_id=lesson.course_id)
-            db.add(course_progress)
+        course_progress = _get_or_create(db, Progress, user_id=current_user.id, course_id=lesson.course_id)
         
         # Calculate completion percentage
         total_lessons = db.query(Lesson).filter(Lesson.course_id == lesson.course_id).count()
@@ -92,8 +73,7 @@ def complete_lesson(
             course_progress.completed_at = datetime.utcnow()
         
         # Award XP
-        current_user.total_xp += lesson.xp_reward
-        current_user.level = (current_user.total_xp // 1000) + 1
+        award_xp(db, current_user.id, lesson.xp_reward)
         
         db.commit()
     
@@ -101,7 +81,7 @@ def complete_lesson(
 
 @router.get("/lessons/user", response_model=List[LessonProgressResponse])
 def get_user_lesson_progress(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     progress = db.query(LessonProgress).filter(
@@ -1,51 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models.quiz import Quiz, QuizQuestion, QuizOption
 from models.lesson import Lesson
 from schemas.quiz import QuizCreate, QuizResponse
 from services.ai_quiz_service import generate_quiz_questions
+from services.quiz_builder import BATCHED_RETURNING, MissingLessonError, create_quizzes
+from services.quiz_cache import quiz_cache, load_quiz_trees
+from http_cache import conditional
+from query_stats import query_budget
 from typing import List
 
 router = APIRouter()
 
+MAX_BULK_QUIZZES = 200
+
+def _snapshot_response(request: Request, snapshot):
+    response = Response(content=snapshot.body, media_type="application/json")
+    return conditional(request, response, snapshot.etag, max_age=0) or response
+
+# Quiz trees load in 3 queries (quizzes, questions, options) on a cache miss; 0 on a hit
 @router.get("/lesson/{lesson_id}", response_model=List[QuizResponse])
-def get_quizzes_by_lesson(lesson_id: int, db: Session = Depends(get_db)):
-    quizzes = db.query(Quiz).filter(Quiz.lesson_id == lesson_id).all()
-    return quizzes
+@query_budget(3)
+def get_quizzes_by_lesson(lesson_id: int, request: Request, db: Session = Depends(get_db)):
+    return _snapshot_response(request, quiz_cache.lesson(db, lesson_id))
 
 @router.get("/{quiz_id}", response_model=QuizResponse)
-def get_quiz(quiz_id: int, db: Session = Depends(get_db)):
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
-    if not quiz:
+@query_budget(3)
+def get_quiz(quiz_id: int, request: Request, db: Session = Depends(get_db)):
+    snapshot = quiz_cache.quiz(db, quiz_id)
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    return quiz
+    return _snapshot_response(request, snapshot)
+
+# Lesson check (1) + one INSERT per level (3) + reading the tree back (3). Only holds where
+# the INSERTs batch; SQLite runs one per row, so it goes without a budget
+CREATE_QUERY_BUDGET = 7 if BATCHED_RETURNING else None
 
 @router.post("/", response_model=QuizResponse)
+@query_budget(CREATE_QUERY_BUDGET)
 def create_quiz(quiz: QuizCreate, db: Session = Depends(get_db)):
-    # Create quiz
-    quiz_data = quiz.dict(exclude={'questions'})
-    new_quiz = Quiz(**quiz_data)
-    db.add(new_quiz)
-    db.commit()
-    db.refresh(new_quiz)
-    
-    # Create questions and options
-    for question_data in quiz.questions:
-        options_data = question_data.pop('options', [])
-        question = QuizQuestion(quiz_id=new_quiz.id, **question_data)
-        db.add(question)
-        db.commit()
-        db.refresh(question)
-        
-        for option_data in options_data:
-            option = QuizOption(question_id=question.id, **option_data)
-            db.add(option)
-        
-        db.commit()
-    
-    db.refresh(new_quiz)
-    return new_quiz
+    """Create a quiz with its questions and options in one transaction"""
+    return _create(db, [quiz])[0]
+
+@router.post("/bulk", response_model=List[QuizResponse])
+@query_budget(CREATE_QUERY_BUDGET)
+def create_quizzes_bulk(quizzes: List[QuizCreate], db: Session = Depends(get_db)):
+    """Create many quizzes at once (authoring tools, generated imports); all or nothing"""
+    if len(quizzes) > MAX_BULK_QUIZZES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_QUIZZES} quizzes per request")
+    return _create(db, quizzes)
+
+def _create(db: Session, quizzes: List[QuizCreate]):
+    try:
+        quiz_ids = create_quizzes(db, quizzes)
+    except MissingLessonError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return load_quiz_trees(db, Quiz.id.in_(quiz_ids))
 
 @router.delete("/{quiz_id}")
 def delete_quiz(quiz_id: int, db: Session = Depends(get_db)):
@@ -61,16 +73,16 @@ def delete_quiz(quiz_id: int, db: Session = Depends(get_db)):
 async def get_dynamic_quiz_questions(
     quiz_id: int,
     num_questions: int = 5,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate dynamic quiz questions using AI (different each time)"""
     
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    quiz = await db.get(Quiz, quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
     # Get lesson to determine topic
-    lesson = db.query(Lesson).filter(Lesson.id == quiz.lesson_id).first()
+    lesson = await db.get(Lesson, quiz.lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
@@ -96,11 +108,11 @@ async def get_dynamic_quiz_questions(
 async def generate_ai_quiz_for_lesson(
     lesson_id: int,
     num_questions: int = 5,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate a complete AI quiz for a lesson"""
     
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    lesson = await db.get(Lesson, lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models.quiz import Quiz, QuizQuestion, QuizOption
 from models.quiz_attempt import QuizAttempt
 from models.user import User
 from schemas.quiz import QuizSubmission
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
 from services.ai_quiz_service import generate_quiz_feedback
+from services.quiz_cache import quiz_cache
+from services.gamification_service import award_xp
 from datetime import datetime
 
 router = APIRouter()
@@ -14,33 +19,17 @@ router = APIRouter()
 @router.post("/submit")
 async def submit_quiz(
     submission: QuizSubmission,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Get quiz
-    quiz = db.query(Quiz).filter(Quiz.id == submission.quiz_id).first()
+    # Answer key comes from the quiz cache (3 queries when older than a few seconds); grading runs no queries
+    quiz = await quiz_cache.answer_key(db, submission.quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
     # Calculate score
-    total_points = 0
-    earned_points = 0
-    correct_count = 0
-    
-    for question in quiz.questions:
-        total_points += question.points
-        user_answer = submission.answers.get(question.id)
-        
-        if user_answer:
-            correct_option = db.query(QuizOption).filter(
-                QuizOption.question_id == question.id,
-                QuizOption.id == user_answer,
-                QuizOption.is_correct == True
-            ).first()
-            
-            if correct_option:
-                earned_points += question.points
-                correct_count += 1
+    total_points = quiz.total_points
+    earned_points, correct_count = quiz.grade(submission.answers)
     
     score = (earned_points / total_points * 100) if total_points > 0 else 0
     passed = 1 if score >= quiz.passing_score else 0
@@ -48,7 +37,7 @@ async def submit_quiz(
     # Generate AI feedback
     ai_feedback = await generate_quiz_feedback(
         score=score,
-        total_questions=len(quiz.questions),
+        total_questions=quiz.question_count,
         correct_answers=correct_count,
         topic=quiz.title
     )
@@ -56,7 +45,7 @@ async def submit_quiz(
     # Save attempt
     attempt = QuizAttempt(
         user_id=current_user.id,
-        quiz_id=quiz.id,
+        quiz_id=quiz.quiz_id,
         score=score,
         answers=submission.answers,
         time_taken_minutes=submission.time_taken_minutes,
@@ -67,12 +56,16 @@ async def submit_quiz(
     # Award XP if passed
     xp_earned = 0
     if passed:
-        current_user.total_xp += quiz.xp_reward
+        await db.run_sync(award_xp, current_user.id, quiz.xp_reward)
         xp_earned = quiz.xp_reward
-        # Level up logic (every 1000 XP = 1 level)
-        current_user.level = (current_user.total_xp // 1000) + 1
     
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Deleted on another worker since the answer key was loaded
+        await db.rollback()
+        quiz_cache.invalidate([("quiz", quiz.quiz_id)])
+        raise HTTPException(status_code=404, detail="Quiz not found")
     
     return {
         "score": score,
@@ -80,7 +73,7 @@ async def submit_quiz(
         "earned_points": earned_points,
         "total_points": total_points,
         "correct_answers": correct_count,
-        "total_questions": len(quiz.questions),
+        "total_questions": quiz.question_count,
         "xp_earned": xp_earned,
         "ai_feedback": ai_feedback,
         "must_retake": score < 50
@@ -89,7 +82,7 @@ async def submit_quiz(
 @router.get("/attempts/{quiz_id}")
 def get_quiz_attempts(
     quiz_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     attempts = db.query(QuizAttempt).filter(
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from models.user import User
 from models.resume_analysis import ResumeAnalysis
 from schemas.resume import ResumeAnalysisResponse, ResumeUploadResponse
-from routes.auth import get_current_user
+from routes.auth import get_current_user, get_user_read_db
 from services.resume_analyzer_service import extract_text_from_pdf, analyze_resume
 from typing import List
 import os
@@ -20,7 +22,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 @router.post("/upload", response_model=ResumeUploadResponse)
 async def upload_resume(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload and analyze resume PDF"""
@@ -44,7 +46,7 @@ async def upload_resume(
     
     # Extract text from PDF
     try:
-        resume_text = extract_text_from_pdf(file_path)
+        resume_text = await run_in_threadpool(extract_text_from_pdf, file_path)
     except Exception as e:
         # Clean up file if extraction fails
         if os.path.exists(file_path):
@@ -70,8 +72,7 @@ async def upload_resume(
     )
     
     db.add(resume_analysis)
-    db.commit()
-    db.refresh(resume_analysis)
+    await db.commit()
     
     return {
         "message": "Resume analyzed successfully",
@@ -80,7 +81,7 @@ async def upload_resume(
 
 @router.get("/my-analyses", response_model=List[ResumeAnalysisResponse])
 def get_my_analyses(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all resume analyses for current user"""
@@ -0,0 +1,40 @@
+import asyncio
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from database import get_read_db
+from schemas.search import SearchResponse, SuggestResponse
+from services.catalog_cache import catalog_cache
+from services.search_service import search
+from services.title_suggest import title_suggester, SUGGEST_LIMIT
+from query_stats import query_budget
+from typing import Literal, Optional
+
+router = APIRouter()
+
+# Catalog reload (2) + match page and facets on PostgreSQL (2); the BM25 index needs none
+@router.get("", response_model=SearchResponse)
+@query_budget(4)
+def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[Literal["course", "lesson"]] = None,
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """Ranked courses and lessons for q, with highlighted snippets and category/difficulty facets"""
+    return search(db, catalog_cache.get(), q, type, category, difficulty, limit)
+
+# Catalog reload (2) + popularity counts (2) when the snapshot changed; otherwise none
+@router.get("/suggest", response_model=SuggestResponse)
+@query_budget(4)
+async def suggest_titles(
+    response: Response,
+    q: str = Query(..., max_length=100),
+    limit: int = Query(SUGGEST_LIMIT, ge=1, le=20)
+):
+    """Course and lesson titles with a word starting with q, most popular first"""
+    catalog = await catalog_cache.aget()
+    index = title_suggester.fresh(catalog) or await asyncio.to_thread(title_suggester.current, catalog)
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return {"query": q, "suggestions": index.lookup(q, limit)}
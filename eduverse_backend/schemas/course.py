@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+from schemas.lesson_schema import LessonCreate
+from schemas.quiz import QuizCreate, QuizQuestionCreate, QuizOptionCreate
+from schemas.badge import BadgeCreate
 
 class CourseCreate(BaseModel):
     title: str
@@ -23,4 +26,44 @@ class CourseResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CourseImportSummary(BaseModel):
+    course_id: int
+    lessons: int
+    quizzes: int
+    questions: int
+    options: int
+    badges_created: int
+    badges_updated: int
+
+
+# Records of a course export (services/course_transfer). Built on the create schemas, with
+# the source ids that link children to parents, and nullable wherever the column is.
+class CourseRecord(CourseCreate):
+    id: Optional[int] = None
+
+class LessonRecord(LessonCreate):
+    id: Optional[int] = None
+    course_id: Optional[int] = None  # always the imported course
+    ai_summary: Optional[str] = None
+
+class QuizRecord(QuizCreate):
+    id: Optional[int] = None
+    passing_score: Optional[int] = 70
+    xp_reward: Optional[int] = 0
+
+class QuestionRecord(QuizQuestionCreate):
+    id: Optional[int] = None
+    quiz_id: int
+    question_type: Optional[str] = "multiple_choice"
+    points: Optional[int] = 10
+    explanation: Optional[str] = None
+
+class OptionRecord(QuizOptionCreate):
+    question_id: int
+    is_correct: Optional[bool] = False
+
+class BadgeRecord(BadgeCreate):
+    criteria: Optional[str] = None
+    xp_reward: Optional[int] = 0
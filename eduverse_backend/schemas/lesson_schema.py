@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class LessonCreate(BaseModel):
     course_id: int
@@ -23,4 +23,39 @@ class LessonResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class LessonOutline(BaseModel):
+    """Lesson without its body, for sidebars and list views"""
+    id: int
+    course_id: int
+    title: str
+    order: Optional[int]
+    duration_minutes: Optional[int]
+    xp_reward: int
+    
+    class Config:
+        from_attributes = True
+
+class RelatedLessonResponse(LessonOutline):
+    course_title: Optional[str]
+    score: float  # cosine similarity of the TF-IDF vectors, 0-1
+
+class LessonSectionInfo(BaseModel):
+    index: int
+    heading: str
+    anchor: str
+    bytes: int
+
+class LessonSections(BaseModel):
+    lesson_id: int
+    title: str
+    sections: List[LessonSectionInfo]
+
+class LessonSectionContent(BaseModel):
+    lesson_id: int
+    index: int
+    heading: str
+    anchor: str
+    content: str
+    total_sections: int
\ No newline at end of file
@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SearchHit(BaseModel):
+    type: str  # "course" or "lesson"
+    id: int
+    course_id: int
+    title: str
+    category: Optional[str]
+    difficulty: Optional[str]
+    score: float
+    snippet: str  # HTML-escaped text with matches wrapped in <mark>
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class SearchFacets(BaseModel):
+    category: List[FacetCount]
+    difficulty: List[FacetCount]
+
+class SearchResponse(BaseModel):
+    query: str
+    engine: str
+    total: int
+    took_ms: float
+    hits: List[SearchHit]
+    facets: SearchFacets
+
+class Suggestion(BaseModel):
+    type: str
+    id: int
+    course_id: int
+    title: str
+    popularity: int
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
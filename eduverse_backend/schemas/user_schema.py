@@ -28,4 +28,8 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
-    user: UserResponse
\ No newline at end of file
+    refresh_token: Optional[str] = None
+    user: UserResponse
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Write-behind buffer for users.last_activity and streak updates
+
+touch() only records the activity in memory; repeated touches for the same user coalesce.
+A background task flushes everything every ACTIVITY_FLUSH_SECONDS with one SELECT (for the
+users whose streak needs recalculating) and one batched UPDATE by primary key, so logins and
+streak bumps no longer commit against the hot users row on the request path.
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import select, update
+from database import AsyncSessionLocal
+from models.user import User
+from services.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "5"))
+
+
+class ActivityBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> (latest activity time, streak requested)
+        self.touches = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def touch(self, user_id: int, streak: bool = False):
+        """Record activity for a user; safe to call from sync and async routes"""
+        now = datetime.utcnow()
+        with self._lock:
+            self.touches += 1
+            _, pending_streak = self._pending.get(user_id, (None, False))
+            self._pending[user_id] = (now, pending_streak or streak)
+
+    def drain(self) -> dict:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: dict):
+        """Put back entries from a failed flush without losing newer touches"""
+        with self._lock:
+            for user_id, (touched_at, streak) in pending.items():
+                newer_at, newer_streak = self._pending.get(user_id, (touched_at, False))
+                self._pending[user_id] = (max(touched_at, newer_at), streak or newer_streak)
+
+    def record_flush(self, written: int):
+        with self._lock:
+            self.flushes += 1
+            self.rows_written += written
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending_users": len(self._pending),
+                "touches": self.touches,
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "flush_interval_seconds": ACTIVITY_FLUSH_SECONDS
+            }
+
+
+activity_buffer = ActivityBuffer()
+
+_flush_task = None
+
+
+def touch(user_id: int, streak: bool = False):
+    activity_buffer.touch(user_id, streak)
+
+
+def _next_streak(streak_days: int, last_activity: datetime, now: datetime) -> int:
+    if last_activity is None:
+        return 1
+    days_diff = (now - last_activity).days
+    if days_diff == 1:
+        # Consecutive day - increment streak
+        return (streak_days or 0) + 1
+    if days_diff > 1:
+        # Streak broken - reset
+        return 1
+    # Same day - keep streak
+    return streak_days
+
+
+async def flush():
+    """Write all buffered activity in one batched UPDATE"""
+    pending = activity_buffer.drain()
+    if not pending:
+        return 0
+
+    try:
+        async with AsyncSessionLocal() as db:
+            streak_ids = [user_id for user_id, (_, streak) in pending.items() if streak]
+            current = {}
+            if streak_ids:
+                rows = await db.execute(
+                    select(User.id, User.streak_days, User.last_activity).where(User.id.in_(streak_ids))
+                )
+                current = {user_id: (streak_days, last_activity) for user_id, streak_days, last_activity in rows}
+
+            activity_only, with_streak = [], []
+            for user_id, (touched_at, streak) in pending.items():
+                if streak:
+                    if user_id not in current:
+                        continue  # user deleted since the touch
+                    streak_days, last_activity = current[user_id]
+                    with_streak.append({
+                        "id": user_id,
+                        "last_activity": touched_at,
+                        "streak_days": _next_streak(streak_days, last_activity, touched_at)
+                    })
+                else:
+                    activity_only.append({"id": user_id, "last_activity": touched_at})
+
+            # ORM bulk UPDATE by primary key; rows with the same keys go in one executemany
+            for params in (activity_only, with_streak):
+                if params:
+                    await db.execute(update(User), params)
+            await db.commit()
+    except Exception:
+        logger.exception("Activity flush failed; keeping %d users for the next attempt", len(pending))
+        activity_buffer.restore(pending)
+        return 0
+
+    for params in activity_only + with_streak:
+        principal_cache.update_fields(params["id"], {key: value for key, value in params.items() if key != "id"})
+
+    written = len(activity_only) + len(with_streak)
+    activity_buffer.record_flush(written)
+    return written
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(ACTIVITY_FLUSH_SECONDS)
+        # Shielded so stop() cannot cancel a flush halfway and drop the drained entries
+        await asyncio.shield(flush())
+
+
+def start():
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_periodically())
+
+
+async def stop():
+    """Stop the background flusher and write whatever is still buffered"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    await flush()
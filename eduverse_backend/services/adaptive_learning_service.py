@@ -1,16 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.course import Course
 from models.lesson import Lesson
+from models.quiz import Quiz
+from schemas.lesson_schema import LessonOutline
 from typing import List
 
-async def get_personalized_recommendations(user_id: int, quiz_attempts: List, db: Session):
+async def get_personalized_recommendations(user_id: int, quiz_attempts: List, db: AsyncSession):
     """Generate personalized learning recommendations based on user performance"""
     
     if not quiz_attempts:
         # New user - recommend beginner courses
-        beginner_courses = db.query(Course).filter(
-            Course.difficulty == "Beginner"
-        ).limit(3).all()
+        beginner_courses = (await db.scalars(
+            select(Course).where(Course.difficulty == "Beginner").limit(3)
+        )).all()
         
         return {
             "message": "Welcome! Here are some beginner courses to get you started.",
@@ -27,22 +30,22 @@ async def get_personalized_recommendations(user_id: int, quiz_attempts: List, db
     if weak_quizzes:
         # Recommend review materials
         weak_quiz_ids = [attempt.quiz_id for attempt in weak_quizzes]
-        review_lessons = db.query(Lesson).filter(
-            Lesson.quizzes.any(id__in=weak_quiz_ids)
-        ).limit(3).all()
+        review_lessons = (await db.scalars(
+            select(Lesson).where(Lesson.quizzes.any(Quiz.id.in_(weak_quiz_ids))).limit(3)
+        )).all()
         
         return {
             "message": "We noticed you might need some review in these areas.",
-            "recommendations": review_lessons,
+            "recommendations": [LessonOutline.model_validate(lesson) for lesson in review_lessons],
             "reason": "needs_review",
             "average_score": avg_score
         }
     
     # High performer - recommend advanced content
     if avg_score >= 80:
-        advanced_courses = db.query(Course).filter(
-            Course.difficulty.in_(["Intermediate", "Advanced"])
-        ).limit(3).all()
+        advanced_courses = (await db.scalars(
+            select(Course).where(Course.difficulty.in_(["Intermediate", "Advanced"])).limit(3)
+        )).all()
         
         return {
             "message": "Great job! You're ready for more advanced content.",
@@ -52,9 +55,9 @@ async def get_personalized_recommendations(user_id: int, quiz_attempts: List, db
         }
     
     # Average performer - recommend intermediate content
-    intermediate_courses = db.query(Course).filter(
-        Course.difficulty == "Intermediate"
-    ).limit(3).all()
+    intermediate_courses = (await db.scalars(
+        select(Course).where(Course.difficulty == "Intermediate").limit(3)
+    )).all()
     
     return {
         "message": "Keep up the good work! Here are some courses to continue your learning.",
@@ -1,21 +1,9 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    model = None
+from services import ai_gateway
 
 async def get_ai_response(message: str, context: str = None, lesson_content: str = None) -> str:
     """Get AI response using Google Gemini"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return "AI chatbot is not configured. Please set GEMINI_API_KEY in your .env file."
     
     try:
@@ -56,8 +44,7 @@ Provide a helpful, educational response that:
 
 Response:"""
         
-        response = model.generate_content(prompt)
-        return response.text
+        return await ai_gateway.generate(prompt)
         
     except Exception as e:
         return f"I apologize, but I encountered an error: {str(e)}. Please try again or rephrase your question."
\ No newline at end of file
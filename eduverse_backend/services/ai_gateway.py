@@ -0,0 +1,67 @@
+import asyncio
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+# Max number of Gemini calls in flight per worker; extra calls wait their turn
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "32"))
+# Deadline for a single call, including time spent waiting for a slot
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+
+# Created on first use so importing the app never loads the Gemini SDK
+model = None
+_model_lock = threading.Lock()
+_semaphore = None
+
+
+class AIGatewayError(Exception):
+    """Raised when the AI backend is unavailable or a call misses its deadline"""
+
+
+def is_configured() -> bool:
+    """Check whether a Gemini model is available"""
+    return model is not None or bool(GEMINI_API_KEY)
+
+
+def _get_model():
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=GEMINI_API_KEY)
+                model = genai.GenerativeModel(GEMINI_MODEL)
+    return model
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _generate(prompt: str) -> str:
+    # The first call imports the SDK in a worker thread instead of on the event loop
+    gemini = model or await asyncio.to_thread(_get_model)
+    async with _get_semaphore():
+        response = await gemini.generate_content_async(prompt)
+    return response.text
+
+
+async def generate(prompt: str, timeout: float = None) -> str:
+    """Run a Gemini prompt without blocking the event loop and return the response text"""
+
+    if not is_configured():
+        raise AIGatewayError("AI service not configured")
+
+    try:
+        return await asyncio.wait_for(_generate(prompt), timeout or AI_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise AIGatewayError("AI request timed out")
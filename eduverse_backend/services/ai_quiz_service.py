@@ -1,22 +1,10 @@
-import google.generativeai as genai
-import os
 import json
-from dotenv import load_dotenv
-
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    model = None
+from services import ai_gateway
 
 async def generate_quiz_questions(topic: str, difficulty: str, num_questions: int = 5):
     """Generate quiz questions using AI"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return {"error": "AI service not configured"}
     
     try:
@@ -40,11 +28,11 @@ Return the response in this exact JSON format:
 
 Make sure questions are educational, clear, and appropriate for {difficulty} level learners."""
 
-        response = model.generate_content(prompt)
+        response_text = await ai_gateway.generate(prompt)
         
         # Parse JSON response
         try:
-            quiz_data = json.loads(response.text)
+            quiz_data = json.loads(response_text)
             return quiz_data
         except json.JSONDecodeError:
             # If response is not valid JSON, return a structured error
@@ -59,7 +47,7 @@ Make sure questions are educational, clear, and appropriate for {difficulty} lev
 async def generate_quiz_feedback(score: float, total_questions: int, correct_answers: int, topic: str) -> str:
     """Generate personalized AI feedback based on quiz performance"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return "Great effort! Keep practicing to improve your skills."
     
     try:
@@ -81,8 +69,7 @@ Keep the feedback positive, constructive, and under 150 words.
 
 Feedback:"""
         
-        response = model.generate_content(prompt)
-        return response.text
+        return await ai_gateway.generate(prompt)
         
     except Exception as e:
         return f"Great job completing the quiz! Keep practicing to master {topic}."
@@ -90,7 +77,7 @@ Feedback:"""
 async def generate_adaptive_recommendations(course_title: str, assessment_score: float, weak_areas: list) -> dict:
     """Generate AI-powered learning path recommendations based on assessment"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return {
             "recommended_lessons": [],
             "skill_gaps": [],
@@ -112,8 +99,7 @@ Based on this score, provide recommendations in JSON format:
 
 Provide ONLY the JSON response."""
         
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
+        result_text = (await ai_gateway.generate(prompt)).strip()
         
         # Extract JSON
         if "```json" in result_text:
@@ -0,0 +1,179 @@
+"""
+Username/email availability backed by in-memory Bloom filters
+
+The filters are built from the users table at startup and updated on registration. A Bloom
+filter has no false negatives, so "not in the filter" means the name is free without a
+database round-trip; only possible collisions fall through to an exact query.
+
+Users registered by other workers are picked up by an incremental refresh at most every
+AVAILABILITY_REFRESH_SECONDS. It re-reads ids from AVAILABILITY_REFRESH_OVERLAP_IDS below the
+highest id it has loaded from the database, since ids are assigned before commit and a
+lower id can become visible after a higher one. Registrations this worker makes itself
+never move that watermark. Every AVAILABILITY_REBUILD_SECONDS the filters are rebuilt from
+scratch, which also catches anything older than the overlap window.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.user import User
+
+AVAILABILITY_FALSE_POSITIVE_RATE = float(os.getenv("AVAILABILITY_FALSE_POSITIVE_RATE", "0.01"))
+AVAILABILITY_REFRESH_SECONDS = float(os.getenv("AVAILABILITY_REFRESH_SECONDS", "10"))
+AVAILABILITY_REBUILD_SECONDS = float(os.getenv("AVAILABILITY_REBUILD_SECONDS", "3600"))
+AVAILABILITY_REFRESH_OVERLAP_IDS = 1000
+# Filters are sized for this many users even when the table is smaller, so growth does not
+# push the false-positive rate up before the next restart
+AVAILABILITY_MIN_CAPACITY = 100_000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = max(capacity, 1)
+        self.num_bits = max(8, int(-self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value: str):
+        added = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        # Re-adding a value (refresh overlap) sets no new bits and is not counted again
+        if added:
+            self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.usernames = None
+        self.emails = None
+        self.loaded_through_id = 0  # highest id read from the database (refresh watermark)
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+        self._added_during_build = None  # (username, email) added while build() streams rows
+        self.answered_from_filter = 0
+        self.database_lookups = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.usernames is not None
+
+    def add(self, username: str, email: str):
+        """Record a user this worker just created (does not advance the refresh watermark)"""
+        if not self.ready:
+            return
+        with self._lock:
+            self.usernames.add(username)
+            self.emails.add(email)
+            if self._added_during_build is not None:
+                self._added_during_build.append((username, email))
+
+    @staticmethod
+    def _load(usernames: BloomFilter, emails: BloomFilter, rows) -> int:
+        """Add rows to the filters; returns the highest id seen"""
+        highest = 0
+        for user_id, username, email in rows:
+            usernames.add(username)
+            emails.add(email)
+            highest = max(highest, user_id)
+        return highest
+
+    async def build(self, db: AsyncSession):
+        """Load every username and email; called at startup and every AVAILABILITY_REBUILD_SECONDS"""
+        self.built_at = self.refreshed_at = time.monotonic()
+        with self._lock:
+            self._added_during_build = []
+        try:
+            total = (await db.execute(select(func.count(User.id)))).scalar_one()
+            capacity = max(total * 2, AVAILABILITY_MIN_CAPACITY)
+            # Filled off to the side and swapped in whole, so checks never see a partial filter
+            usernames = BloomFilter(capacity, AVAILABILITY_FALSE_POSITIVE_RATE)
+            emails = BloomFilter(capacity, AVAILABILITY_FALSE_POSITIVE_RATE)
+            highest = 0
+            rows = await db.stream(select(User.id, User.username, User.email).execution_options(yield_per=5000))
+            async for partition in rows.partitions():
+                highest = max(highest, self._load(usernames, emails, partition))
+        except Exception:
+            # The current filters (if any) stay in use; the next rebuild is a full interval away
+            with self._lock:
+                self._added_during_build = None
+            raise
+        with self._lock:
+            # Users this worker registered while the rows were streaming may not be in them
+            for username, email in self._added_during_build:
+                usernames.add(username)
+                emails.add(email)
+            self._added_during_build = None
+            self.usernames, self.emails = usernames, emails
+            self.loaded_through_id = highest
+
+    async def refresh(self, db: AsyncSession):
+        """Pick up users created by other workers since the last build/refresh"""
+        if not self.ready or time.monotonic() - self.refreshed_at < AVAILABILITY_REFRESH_SECONDS:
+            return
+        if time.monotonic() - self.built_at >= AVAILABILITY_REBUILD_SECONDS:
+            await self.build(db)
+            return
+        self.refreshed_at = time.monotonic()
+        since = self.loaded_through_id - AVAILABILITY_REFRESH_OVERLAP_IDS
+        rows = await db.execute(select(User.id, User.username, User.email).where(User.id > since))
+        with self._lock:
+            highest = self._load(self.usernames, self.emails, rows)
+            self.loaded_through_id = max(self.loaded_through_id, highest)
+
+    def might_exist(self, field: str, value: str) -> bool:
+        """False means definitely free; True means an exact lookup is needed"""
+        if not self.ready:
+            return True
+        bloom = self.usernames if field == "username" else self.emails
+        if value in bloom:
+            return True
+        self.answered_from_filter += 1
+        return False
+
+    def stats(self) -> dict:
+        if not self.ready:
+            return {"ready": False}
+        return {
+            "ready": True,
+            "users_loaded": self.usernames.count,
+            "bits_per_filter": self.usernames.num_bits,
+            "hash_functions": self.usernames.num_hashes,
+            "estimated_false_positive_rate": round(self.usernames.estimated_false_positive_rate(), 6),
+            "answered_from_filter": self.answered_from_filter,
+            "database_lookups": self.database_lookups
+        }
+
+
+availability_index = AvailabilityIndex()
+
+
+async def is_taken(db: AsyncSession, field: str, value: str) -> bool:
+    """Exact check, skipped when the Bloom filter proves the value is free"""
+    if not availability_index.might_exist(field, value):
+        return False
+    availability_index.database_lookups += 1
+    column = User.username if field == "username" else User.email
+    return (await db.execute(select(User.id).where(column == value).limit(1))).first() is not None
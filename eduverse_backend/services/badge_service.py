@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.badge import Badge, UserBadge
 from models.user import User
+from services.gamification_service import award_xp
 from datetime import datetime
 
 def award_badge_to_user(user_id: int, badge_criteria: str, db: Session):
@@ -29,10 +30,7 @@ def award_badge_to_user(user_id: int, badge_criteria: str, db: Session):
     db.add(user_badge)
     
     # Award XP to user
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.total_xp += badge.xp_reward
-        user.level = (user.total_xp // 1000) + 1
+    award_xp(db, user_id, badge.xp_reward)
     
     db.commit()
     db.refresh(user_badge)
@@ -0,0 +1,152 @@
+"""
+In-process cache of the course -> lesson tree
+
+The whole catalog is loaded with two queries into an immutable, versioned snapshot that the
+catalog read routes and the chatbot serve from memory. Any committed ORM change to a Course
+or Lesson bumps the version and drops the snapshot in this worker; other workers pick the
+change up within CATALOG_CACHE_TTL_SECONDS.
+"""
+import asyncio
+import os
+import threading
+import time
+from itertools import chain
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from http_cache import make_etag
+from services.lesson_sections import build_section_index
+from models.course import Course
+from models.lesson import Lesson
+
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+
+OUTLINE_FIELDS = ("id", "course_id", "title", "order", "duration_minutes", "xp_reward")
+
+
+class CatalogSnapshot:
+    def __init__(self, version: int, courses: list, lessons: list):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._etags = {}
+        self.courses = {course["id"]: course for course in sorted(courses, key=lambda c: c["id"])}
+        self.lessons = {lesson["id"]: lesson for lesson in lessons}
+        self.lessons_by_course = {course_id: [] for course_id in self.courses}
+        # Same order as ORDER BY lessons."order" (NULLs last), ties by id
+        for lesson in sorted(lessons, key=lambda l: (l["order"] is None, l["order"] or 0, l["id"])):
+            self.lessons_by_course.setdefault(lesson["course_id"], []).append(lesson)
+
+    def course_list(self) -> list:
+        return list(self.courses.values())
+
+    def outline(self, course_id: int) -> list:
+        return [
+            {field: lesson[field] for field in OUTLINE_FIELDS}
+            for lesson in self.lessons_by_course.get(course_id, [])
+        ]
+
+    def sections(self, lesson_id: int) -> list:
+        """Section index of a cached lesson (built on the fly for rows not yet backfilled)"""
+        lesson = self.lessons[lesson_id]
+        if lesson["section_index"] is None:
+            lesson["section_index"] = build_section_index(lesson["content"])
+        return lesson["section_index"]
+
+    def etag(self, key, build) -> str:
+        """ETag of a response built from this snapshot, hashed once per snapshot"""
+        etag = self._etags.get(key)
+        if etag is None:
+            etag = self._etags[key] = make_etag(build())
+        return etag
+
+
+class CatalogCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            return snapshot
+        return None
+
+    def get(self) -> CatalogSnapshot:
+        """Current snapshot, loading it from the database on a miss"""
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            version = self.version
+            snapshot = CatalogSnapshot(version, *self._load())
+            # An invalidation that raced with the load means this data may already be stale
+            if version == self.version:
+                self._snapshot = snapshot
+            return snapshot
+
+    async def aget(self) -> CatalogSnapshot:
+        """get() for async routes; a miss loads in a worker thread"""
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        return await asyncio.to_thread(self.get)
+
+    def _load(self):
+        # Primary, not the replica: a reload right after an edit must not cache pre-edit rows
+        db = SessionLocal()
+        try:
+            courses = [dict(row) for row in db.execute(select(Course.__table__)).mappings()]
+            lessons = [dict(row) for row in db.execute(select(Lesson.__table__)).mappings()]
+        finally:
+            db.close()
+        return courses, lessons
+
+    def invalidate(self):
+        self.version += 1
+        self._snapshot = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": self.version,
+            "loaded": snapshot is not None,
+            "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+            "courses": len(snapshot.courses) if snapshot else 0,
+            "lessons": len(snapshot.lessons) if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl
+        }
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_changes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Course, Lesson)):
+            session.info["catalog_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_catalog_changes(session):
+    if session.info.pop("catalog_changed", False):
+        catalog_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_changes(session):
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,279 @@
+"""
+Course export/import as NDJSON, for moving a course between environments
+
+An export is one JSON object per line, parents before children:
+
+    {"type": "header", "format": "eduverse-course", "version": 1}
+    {"type": "course", "id": 3, "title": ...}
+    {"type": "lesson", "id": 12, "title": ..., "content": ...}
+    {"type": "quiz", "id": 4, "lesson_id": 12, ...}
+    {"type": "question", "id": 31, "quiz_id": 4, ...}
+    {"type": "option", "question_id": 31, ...}
+    {"type": "badge", "name": ..., ...}
+
+Ids are the source environment's and only link children to parents. Export reads each
+table through a streaming cursor; import parses the upload line by line and inserts each
+type in batches of IMPORT_BATCH_SIZE with multi-row INSERT ... RETURNING, all in one
+transaction, so memory stays flat apart from the source-id -> new-id maps. Badges are
+global: every export carries all of them and import upserts them by name.
+"""
+import codecs
+import json
+from collections import Counter
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DBAPIError
+from database import AsyncSessionLocal, ReadSessionLocal
+from models.course import Course
+from models.lesson import Lesson
+from models.quiz import Quiz, QuizQuestion, QuizOption
+from models.badge import Badge
+from schemas.course import CourseRecord, LessonRecord, QuizRecord, QuestionRecord, OptionRecord, BadgeRecord
+from services.catalog_cache import catalog_cache
+from services.lesson_sections import build_section_index
+from services.quiz_cache import quiz_cache
+from services.related_lessons import recompute_queue
+
+EXPORT_FORMAT = "eduverse-course"
+EXPORT_VERSION = 1
+IMPORT_BATCH_SIZE = 500
+EXPORT_FETCH_SIZE = 200
+
+# type -> (model, exported fields, (parent field, parent type) or None, import schema)
+RECORD_TYPES = {
+    "course": (Course, ("title", "description", "category", "difficulty", "estimated_hours", "xp_reward", "thumbnail"), None, CourseRecord),
+    "lesson": (Lesson, ("title", "content", "ai_summary", "order", "video_url", "duration_minutes", "xp_reward"), None, LessonRecord),
+    "quiz": (Quiz, ("title", "description", "passing_score", "time_limit_minutes", "xp_reward"), ("lesson_id", "lesson"), QuizRecord),
+    "question": (QuizQuestion, ("question_text", "question_type", "points", "order", "explanation"), ("quiz_id", "quiz"), QuestionRecord),
+    "option": (QuizOption, ("option_text", "is_correct", "order"), ("question_id", "question"), OptionRecord),
+}
+BADGE_FIELDS = ("name", "description", "icon", "criteria", "xp_reward")
+
+
+class CourseImportError(Exception):
+    def __init__(self, line: int, message: str, last_line: int = None):
+        where = f"Lines {line}-{last_line}" if last_line and last_line != line else f"Line {line}"
+        super().__init__(f"{where}: {message}")
+
+
+def _validate(schema, line: int, record: dict):
+    try:
+        return schema.model_validate(record)
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        raise CourseImportError(line, f"invalid {record.get('type')}: {problems}")
+
+
+def _columns(parsed, fields) -> dict:
+    # Only fields present in the record; absent ones take the column default
+    return parsed.model_dump(include=set(fields), exclude_unset=True)
+
+
+def _fill_defaults(model, rows: list):
+    """executemany needs the same keys in every row; absent fields take the column default"""
+    keys = set().union(*rows)
+    for values in rows:
+        for key in keys - values.keys():
+            default = model.__table__.c[key].default
+            values[key] = default.arg if default is not None and default.is_scalar else None
+
+
+def _line(record_type: str, values: dict) -> str:
+    return json.dumps({"type": record_type, **values}, default=str) + "\n"
+
+
+def export_course(course_id: int):
+    """Yield the NDJSON lines of a course tree plus all badges"""
+    courses, lessons, quizzes = Course.__table__, Lesson.__table__, Quiz.__table__
+    questions, options, badges = QuizQuestion.__table__, QuizOption.__table__, Badge.__table__
+
+    def columns(record_type, table, *keys):
+        return [table.c[key] for key in (*keys, *RECORD_TYPES[record_type][1])]
+
+    in_course = lessons.c.course_id == course_id
+    queries = [
+        ("course", select(*columns("course", courses, "id")).where(courses.c.id == course_id)),
+        ("lesson", select(*columns("lesson", lessons, "id")).where(in_course).order_by(lessons.c.order, lessons.c.id)),
+        ("quiz", select(*columns("quiz", quizzes, "id", "lesson_id"))
+            .join(lessons, lessons.c.id == quizzes.c.lesson_id)
+            .where(in_course)
+            .order_by(quizzes.c.id)),
+        ("question", select(*columns("question", questions, "id", "quiz_id"))
+            .join(quizzes, quizzes.c.id == questions.c.quiz_id)
+            .join(lessons, lessons.c.id == quizzes.c.lesson_id)
+            .where(in_course)
+            .order_by(questions.c.id)),
+        ("option", select(*columns("option", options, "question_id"))
+            .join(questions, questions.c.id == options.c.question_id)
+            .join(quizzes, quizzes.c.id == questions.c.quiz_id)
+            .join(lessons, lessons.c.id == quizzes.c.lesson_id)
+            .where(in_course)
+            .order_by(options.c.question_id, options.c.order, options.c.id)),
+        ("badge", select(*(badges.c[field] for field in BADGE_FIELDS)).order_by(badges.c.id)),
+    ]
+
+    yield _line("header", {"format": EXPORT_FORMAT, "version": EXPORT_VERSION})
+    db = ReadSessionLocal()
+    try:
+        for record_type, query in queries:
+            # yield_per streams rows (server-side cursor on PostgreSQL) instead of buffering the table
+            for row in db.execute(query.execution_options(yield_per=EXPORT_FETCH_SIZE)).mappings():
+                yield _line(record_type, dict(row))
+    finally:
+        db.close()
+
+
+async def _aiter_lines(chunks):
+    """Split an async stream of byte chunks into (line number, decoded line)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    number = 0
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            yield number, line
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+class _CourseImport:
+    def __init__(self, db):
+        self.db = db
+        self.course_id = None
+        self.new_ids = {"lesson": {}, "quiz": {}, "question": {}}  # source id -> new id
+        self.counts = Counter()
+        self.pending_type = None
+        self.pending = []  # (line, source id, source parent id, column values) of pending_type
+        self.badges = {}  # name -> (line, values); upserted at the end
+
+    async def add(self, line: int, record: dict):
+        record_type = record.get("type")
+        if record_type == "header":
+            if record.get("format") != EXPORT_FORMAT or record.get("version") != EXPORT_VERSION:
+                raise CourseImportError(line, f"unsupported format {record.get('format')!r} version {record.get('version')!r}")
+            return
+        if record_type == "badge":
+            badge = _validate(BadgeRecord, line, record)
+            if not badge.name:
+                raise CourseImportError(line, "badge without a name")
+            self.badges[badge.name] = (line, _columns(badge, BADGE_FIELDS))
+            return
+        if not isinstance(record_type, str) or record_type not in RECORD_TYPES:
+            raise CourseImportError(line, f"unknown record type {record_type!r}")
+        if record_type == "course" and (self.course_id is not None or self.pending_type == "course"):
+            raise CourseImportError(line, "only one course per import")
+        if record_type != "course" and self.course_id is None and self.pending_type != "course":
+            raise CourseImportError(line, "the course record must come first")
+
+        _, fields, parent, schema = RECORD_TYPES[record_type]
+        parsed = _validate(schema, line, record)
+        source_parent = getattr(parsed, parent[0]) if parent else None
+
+        # Children may reference anything pending, so a change of type flushes the batch
+        if record_type != self.pending_type or len(self.pending) >= IMPORT_BATCH_SIZE:
+            await self.flush()
+        self.pending_type = record_type
+        self.pending.append((line, getattr(parsed, "id", None), source_parent, _columns(parsed, fields)))
+
+    async def flush(self):
+        if not self.pending:
+            return
+        record_type, batch = self.pending_type, self.pending
+        self.pending = []
+        model, _, parent, _ = RECORD_TYPES[record_type]
+
+        rows = []
+        for line, _, source_parent, values in batch:
+            if parent:
+                parent_field, parent_type = parent
+                if source_parent not in self.new_ids[parent_type]:
+                    raise CourseImportError(line, f"{parent_field} {source_parent!r} does not match an imported {parent_type}")
+                values[parent_field] = self.new_ids[parent_type][source_parent]
+            if record_type == "lesson":
+                values["course_id"] = self.course_id
+                # Bulk INSERT skips the ORM validator that keeps section_index in sync
+                values["section_index"] = build_section_index(values.get("content"))
+            rows.append(values)
+
+        _fill_defaults(model, rows)
+        try:
+            if record_type == "option":
+                await self.db.execute(insert(model), rows)
+                created = []
+            else:
+                # One multi-row statement per batch on PostgreSQL, where the SERIAL key keeps RETURNING
+                # in row order; SQLite cannot guarantee that and gets a statement per row
+                result = await self.db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+                created = result.scalars().all()
+        except (DBAPIError, OverflowError) as e:  # OverflowError: sqlite3 refusing an out-of-range int
+            raise CourseImportError(batch[0][0], f"{record_type} rows rejected by the database: {getattr(e, 'orig', e)}", batch[-1][0])
+        if record_type == "course":
+            self.course_id = created[0]
+        else:
+            for (_, source_id, _, _), new_id in zip(batch, created):
+                if source_id is not None:
+                    self.new_ids[record_type][source_id] = new_id
+        self.counts[record_type] += len(rows)
+
+    async def upsert_badges(self):
+        if not self.badges:
+            return
+        names = list(self.badges)
+        existing = {}
+        for start in range(0, len(names), IMPORT_BATCH_SIZE):
+            rows = await self.db.execute(
+                select(Badge.id, Badge.name).where(Badge.name.in_(names[start:start + IMPORT_BATCH_SIZE])).order_by(Badge.id)
+            )
+            for badge_id, name in rows:
+                existing.setdefault(name, badge_id)
+
+        updates = [{"id": existing[name], **values} for name, (_, values) in self.badges.items() if name in existing]
+        inserts = [values for name, (_, values) in self.badges.items() if name not in existing]
+        lines = sorted(line for line, _ in self.badges.values())
+        for rows, statement in ((updates, update(Badge)), (inserts, insert(Badge))):
+            _fill_defaults(Badge, rows)
+            for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+                try:
+                    await self.db.execute(statement, rows[start:start + IMPORT_BATCH_SIZE])
+                except (DBAPIError, OverflowError) as e:
+                    raise CourseImportError(lines[0], f"badge rows rejected by the database: {getattr(e, 'orig', e)}", lines[-1])
+        self.counts["badges_updated"] = len(updates)
+        self.counts["badges_created"] = len(inserts)
+
+
+async def import_course(chunks) -> dict:
+    """Create a course tree from an NDJSON upload in one transaction; returns counts"""
+    async with AsyncSessionLocal() as db:
+        importer = _CourseImport(db)
+        async for line, text in _aiter_lines(chunks):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                raise CourseImportError(line, f"malformed JSON: {e}")
+            if not isinstance(record, dict):
+                raise CourseImportError(line, "expected a JSON object")
+            await importer.add(line, record)
+        await importer.flush()
+        if importer.course_id is None:
+            raise CourseImportError(0, "no course record found")
+        await importer.upsert_badges()
+        await db.commit()
+
+    # Bulk inserts bypass the session hooks that normally notice catalog/content changes
+    catalog_cache.invalidate()
+    quiz_cache.invalidate(("lesson", lesson_id) for lesson_id in importer.new_ids["lesson"].values())
+    recompute_queue.schedule(importer.new_ids["lesson"].values())
+    return {
+        "course_id": importer.course_id,
+        "lessons": importer.counts["lesson"],
+        "quizzes": importer.counts["quiz"],
+        "questions": importer.counts["question"],
+        "options": importer.counts["option"],
+        "badges_created": importer.counts["badges_created"],
+        "badges_updated": importer.counts["badges_updated"]
+    }
@@ -1,9 +1,40 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from models.user import User
 from models.badge import Badge, UserBadge
 from models.progress import LessonProgress
+from services import activity_buffer
 from datetime import datetime
 
+def award_xp(db: Session, user_id: int, amount: int):
+    """
+    Add XP with one atomic UPDATE (total_xp = total_xp + amount) and recompute the level,
+    so awards from other requests/workers are never overwritten by a stale copy of the
+    user (e.g. a cached principal). Returns (total_xp, level), or None if there is no such
+    user; commit is up to the caller.
+    """
+    new_total = User.total_xp + amount
+    row = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(total_xp=new_total, level=new_total // 1000 + 1)
+        .returning(User.total_xp, User.level)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    total_xp, level = row
+    # Keep any copy of the user in this session, and the principal cache on commit, in step
+    user = db.identity_map.get(db.identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, "total_xp", total_xp)
+        set_committed_value(user, "level", level)
+    db.info.setdefault("principal_fields", {}).setdefault(user_id, {}).update(total_xp=total_xp, level=level)
+    # Core UPDATEs skip the flush hook that pins the user's reads to the primary
+    db.info.setdefault("written_user_ids", set()).add(user_id)
+    return total_xp, level
+
 def check_and_award_badges(user_id: int, db: Session):
     """Check if user qualifies for any badges and award them"""
     
@@ -30,7 +61,7 @@ def check_and_award_badges(user_id: int, db: Session):
             if not existing:
                 user_badge = UserBadge(user_id=user_id, badge_id=badge.id)
                 db.add(user_badge)
-                user.total_xp += badge.xp_reward
+                award_xp(db, user_id, badge.xp_reward)
                 awarded_badges.append(badge)
     
     # Check "Streak Champion" badge
@@ -45,37 +76,12 @@ def check_and_award_badges(user_id: int, db: Session):
             if not existing:
                 user_badge = UserBadge(user_id=user_id, badge_id=badge.id)
                 db.add(user_badge)
-                user.total_xp += badge.xp_reward
+                award_xp(db, user_id, badge.xp_reward)
                 awarded_badges.append(badge)
     
-    # Update user level
-    user.level = (user.total_xp // 1000) + 1
-    
     db.commit()
     return awarded_badges
 
-def update_streak(user_id: int, db: Session):
-    """Update user's learning streak"""
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return
-    
-    now = datetime.utcnow()
-    last_activity = user.last_activity
-    
-    if last_activity:
-        days_diff = (now - last_activity).days
-        
-        if days_diff == 1:
-            # Consecutive day - increment streak
-            user.streak_days += 1
-        elif days_diff > 1:
-            # Streak broken - reset
-            user.streak_days = 1
-        # If same day, don't change streak
-    else:
-        user.streak_days = 1
-    
-    user.last_activity = now
-    db.commit()
\ No newline at end of file
+def update_streak(user_id: int):
+    """Update user's learning streak (written by the activity buffer's next flush)"""
+    activity_buffer.touch(user_id, streak=True)
@@ -0,0 +1,168 @@
+"""
+Pre-rendered, pre-compressed lesson HTML
+
+Each lesson's markdown is rendered to HTML once and stored in lesson_renditions together
+with gzip and (when the brotli package is installed) brotli copies, keyed by a hash of the
+markdown. Reads pick the stored bytes for the client's Accept-Encoding, so serving a lesson
+is a byte copy from an in-process LRU instead of render + compress per request.
+
+Raw HTML in lesson markdown is escaped and only http(s), mailto and relative links are
+kept, since the output is meant to be injected into the page as-is.
+"""
+import gzip
+import hashlib
+import html
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal
+from models.lesson_rendition import LessonRendition
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip/identity are offered
+    brotli = None
+
+RENDITION_CACHE_SIZE = int(os.getenv("RENDITION_CACHE_SIZE", "256"))
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "toc", "sane_lists"]
+# Part of every content hash; bump it when the rendering changes to re-render all lessons
+RENDERER_VERSION = "2"
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+
+# Browsers ignore whitespace/control characters inside a scheme ("java\tscript:")
+_IGNORED_URL_CHARS = re.compile(r"[\x00-\x20\x7f]+")
+_URL_SCHEME = re.compile(r"([a-z][a-z0-9+.\-]*):", re.IGNORECASE)
+
+Rendition = namedtuple("Rendition", ["content_hash", "identity", "gzip", "br"])
+
+_cache = OrderedDict()  # content hash -> Rendition
+_cache_lock = threading.Lock()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(f"{RENDERER_VERSION}:{content or ''}".encode("utf-8")).hexdigest()
+
+
+def is_safe_url(url: str) -> bool:
+    """True for http(s)/mailto and relative URLs, judged the way the browser will read them"""
+    # Attribute values are written out without escaping entities, so the browser decodes
+    # "&#106;avascript:" to "javascript:"; decode first so the check sees the same thing
+    decoded = _IGNORED_URL_CHARS.sub("", html.unescape(url))
+    scheme = _URL_SCHEME.match(decoded)
+    if scheme:
+        return scheme.group(1).lower() in SAFE_URL_SCHEMES
+    # No scheme: relative path, fragment or query; a ":" before any "/" would be read as one
+    return ":" not in decoded.split("/", 1)[0]
+
+
+def render_html(content: str) -> str:
+    # Imported on first render so the app boots without loading Markdown
+    import markdown
+    from markdown.treeprocessors import Treeprocessor
+
+    class DropUnsafeLinks(Treeprocessor):
+        def run(self, root):
+            for element in root.iter():
+                for attribute in ("href", "src"):
+                    value = element.get(attribute)
+                    if value is not None and not is_safe_url(value):
+                        del element.attrib[attribute]
+
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    # Escape raw HTML instead of passing it through
+    md.preprocessors.deregister("html_block")
+    md.inlinePatterns.deregister("html")
+    md.treeprocessors.register(DropUnsafeLinks(md), "drop_unsafe_links", 0)
+    return md.convert(content or "")
+
+
+def _from_row(row: LessonRendition) -> Rendition:
+    return Rendition(row.content_hash, row.html.encode("utf-8"), row.html_gzip, row.html_brotli)
+
+
+def build_rendition(lesson_id: int, content: str) -> LessonRendition:
+    """Render and compress a lesson body into a (not yet added) LessonRendition row"""
+    html = render_html(content)
+    raw = html.encode("utf-8")
+    return LessonRendition(
+        lesson_id=lesson_id,
+        content_hash=content_hash(content),
+        html=html,
+        html_gzip=gzip.compress(raw, compresslevel=9, mtime=0),
+        html_brotli=brotli.compress(raw, quality=11) if brotli else None
+    )
+
+
+def _remember(rendition: Rendition):
+    with _cache_lock:
+        _cache[rendition.content_hash] = rendition
+        _cache.move_to_end(rendition.content_hash)
+        while len(_cache) > RENDITION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def get_rendition(lesson_id: int, content: str) -> Rendition:
+    """Rendition for the current lesson body: memory, then the table, then render and store"""
+    digest = content_hash(content)
+    with _cache_lock:
+        rendition = _cache.get(digest)
+        if rendition is not None:
+            _cache.move_to_end(digest)
+            return rendition
+
+    db = SessionLocal()
+    try:
+        row = db.get(LessonRendition, lesson_id)
+        if row is not None and row.content_hash == digest:
+            rendition = _from_row(row)
+        else:
+            # Missing (seeded / pre-existing lesson) or written by a path that skipped regenerate
+            fresh = build_rendition(lesson_id, content)
+            rendition = _from_row(fresh)
+            try:
+                if row is None:
+                    db.add(fresh)
+                else:
+                    db.merge(fresh)
+                db.commit()
+            except IntegrityError:
+                # Another worker stored it first; our copy is just as good to serve
+                db.rollback()
+    finally:
+        db.close()
+
+    _remember(rendition)
+    return rendition
+
+
+def regenerate(db, lesson):
+    """Re-render a lesson inside the caller's transaction (call before commit on writes)"""
+    db.merge(build_rendition(lesson.id, lesson.content))
+
+
+def choose_encoding(accept_encoding: str, rendition: Rendition) -> str:
+    """Best stored encoding the client accepts: br, then gzip, then identity"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    def allowed(name):
+        return accepted.get(name, accepted.get("*", 0.0)) > 0
+
+    if rendition.br is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return "identity"
@@ -0,0 +1,88 @@
+"""
+Section index for lesson markdown
+
+A lesson is split at its "## " headings (fenced code blocks are skipped, so "# comments"
+in code never count). Text before the first "## " - usually the "# Title" and an intro -
+is section 0. Each entry records the heading, a GitHub-style anchor and the UTF-8 byte
+range of the section, so a single section can be sliced out without re-parsing.
+"""
+import re
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SECTION_HEADING = re.compile(r"^##\s+(.+?)\s*#*\s*$")
+_TITLE_HEADING = re.compile(r"^#\s+(.+?)\s*#*\s*$")
+_WORD = re.compile(r"[a-z0-9_]{3,}")
+_STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "your", "can", "how", "what", "why",
+    "when", "where", "which", "who", "does", "did", "have", "has", "this", "that", "with",
+    "from", "about", "into", "there", "their", "them", "they", "use", "using", "explain", "please"
+}
+
+
+def slugify(heading: str) -> str:
+    slug = re.sub(r"[^\w\- ]", "", heading.lower()).strip()
+    return re.sub(r"\s", "-", slug)
+
+
+def build_section_index(content: str) -> list:
+    """[{index, heading, anchor, start, end}] with byte offsets into content.encode("utf-8")"""
+    if not content:
+        return []
+
+    headings = []  # (byte offset, heading text)
+    title = None
+    in_fence = False
+    offset = 0
+    for line in content.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _SECTION_HEADING.match(line)
+            if match:
+                headings.append((offset, match.group(1)))
+            elif title is None:
+                match = _TITLE_HEADING.match(line)
+                if match:
+                    title = match.group(1)
+        offset += len(line.encode("utf-8"))
+    total = offset
+
+    bounds = []
+    first_start = headings[0][0] if headings else total
+    if content.encode("utf-8")[:first_start].strip():
+        bounds.append((0, title or "Introduction"))
+    bounds.extend(headings)
+
+    sections = []
+    seen_anchors = {}
+    for i, (start, heading) in enumerate(bounds):
+        end = bounds[i + 1][0] if i + 1 < len(bounds) else total
+        anchor = slugify(heading)
+        if anchor in seen_anchors:
+            seen_anchors[anchor] += 1
+            anchor = f"{anchor}-{seen_anchors[anchor]}"
+        else:
+            seen_anchors[anchor] = 0
+        sections.append({"index": i, "heading": heading, "anchor": anchor, "start": start, "end": end})
+    return sections
+
+
+def section_text(content: str, section: dict) -> str:
+    return content.encode("utf-8")[section["start"]:section["end"]].decode("utf-8")
+
+
+def most_relevant_section(content: str, sections: list, question: str):
+    """Text of the section sharing the most words with the question (headings weigh more), or None"""
+    words = set(_WORD.findall(question.lower())) - _STOPWORDS
+    if not words or not sections:
+        return None
+
+    best_score, best_text = 0, None
+    for section in sections:
+        text = section_text(content, section)
+        body_words = set(_WORD.findall(text.lower()))
+        heading_words = set(_WORD.findall(section["heading"].lower()))
+        score = 3 * len(words & heading_words) + len(words & body_words)
+        if score > best_score:
+            best_score, best_text = score, text
+    return best_text
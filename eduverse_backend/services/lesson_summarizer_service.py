@@ -1,21 +1,9 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    model = None
+from services import ai_gateway
 
 async def generate_lesson_summary(lesson_title: str, lesson_content: str) -> str:
     """Generate AI summary for a lesson"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return "AI summarization is not available. Please configure GEMINI_API_KEY."
     
     try:
@@ -35,8 +23,7 @@ Please provide a summary that:
 
 Summary:"""
         
-        response = model.generate_content(prompt)
-        return response.text
+        return await ai_gateway.generate(prompt)
         
     except Exception as e:
         return f"Error generating summary: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Password hashing and verification on a dedicated process pool
+
+bcrypt is CPU-bound; running it in the default threadpool lets a login burst starve every
+other sync route. Here it runs in its own worker processes, behind a concurrency cap, and
+callers simply await the result.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost factor; hashes made with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Max hash/verify jobs handed to the pool at once; the rest queue in the worker
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = None
+_executor_lock = threading.Lock()
+_semaphore = None
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordPoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def enqueue(self):
+        with self._lock:
+            self.queued += 1
+
+    def start(self, wait_ms: float):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def finish(self, run_ms: float):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_run_ms += run_ms
+
+    def record_rehash(self):
+        with self._lock:
+            self.rehashed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": PASSWORD_HASH_WORKERS,
+                "concurrency_cap": PASSWORD_HASH_CONCURRENCY,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": completed,
+                "rehashed_on_login": self.rehashed,
+                "avg_wait_ms": round(self.total_wait_ms / completed, 3) if completed else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "avg_run_ms": round(self.total_run_ms / completed, 3) if completed else 0.0
+            }
+
+
+metrics = PasswordPoolMetrics()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: never fork a process that already holds DB connections and threads
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+    return _semaphore
+
+
+async def _run(fn, *args):
+    metrics.enqueue()
+    queued_at = time.perf_counter()
+    async with _get_semaphore():
+        started_at = time.perf_counter()
+        metrics.start((started_at - queued_at) * 1000)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+        finally:
+            metrics.finish((time.perf_counter() - started_at) * 1000)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with the configured bcrypt cost"""
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed_password: str):
+    """Verify a password; returns (is_valid, new_hash) where new_hash is set when the stored hash needs upgrading"""
+    is_valid, new_hash = await _run(_verify_and_update, password, hashed_password)
+    if new_hash:
+        metrics.record_rehash()
+    return is_valid, new_hash
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
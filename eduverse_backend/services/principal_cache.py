@@ -0,0 +1,146 @@
+"""
+Bounded TTL cache of authenticated principals, so get_current_user can skip the users lookup
+
+Entries are keyed by (user id, token). Any committed ORM change to a User row writes the new
+column values through to every cached entry for that user; deletes and changes that cannot be
+snapshotted (e.g. SQL-expression updates) invalidate them instead. Other workers converge
+within PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from models.user import User
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (user_id, token) -> (expires_at, column values)
+        self._keys_by_user = {}  # user_id -> set of entry keys
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, token: str):
+        key = (user_id, token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, values = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return values
+
+    def put(self, user_id: int, token: str, values: dict):
+        key = (user_id, token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def update(self, user_id: int, values: dict):
+        """Write new column values through to every cached token of a user"""
+        with self._lock:
+            for key in self._keys_by_user.get(user_id, ()):
+                expires_at, _ = self._entries[key]
+                self._entries[key] = (expires_at, values)
+
+    def update_fields(self, user_id: int, fields: dict):
+        """Write a subset of columns through (for bulk UPDATEs that bypass the ORM)"""
+        with self._lock:
+            for key in self._keys_by_user.get(user_id, ()):
+                expires_at, values = self._entries[key]
+                self._entries[key] = (expires_at, {**values, **fields})
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "users": len(self._keys_by_user),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_seconds": self.ttl,
+                "max_size": self.maxsize
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def snapshot(user: User):
+    """Column values of a user, or None if any column is not loaded"""
+    state = inspect(user)
+    values = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key not in state.dict:
+            return None
+        values[attr.key] = state.dict[attr.key]
+    return values
+
+
+def attach(db: Session, values: dict) -> User:
+    """Rebuild a cached principal as a persistent User in the session without a SELECT"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session, flush_context):
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj):
+            session.info.setdefault("principal_changes", {})[obj.id] = snapshot(obj)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            session.info.setdefault("principal_changes", {})[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_changes(session):
+    for user_id, values in session.info.pop("principal_changes", {}).items():
+        if values is None:
+            principal_cache.invalidate(user_id)
+        else:
+            principal_cache.update(user_id, values)
+    # Columns changed by Core UPDATEs (e.g. gamification_service.award_xp)
+    for user_id, fields in session.info.pop("principal_fields", {}).items():
+        principal_cache.update_fields(user_id, fields)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop("principal_changes", None)
+    session.info.pop("principal_fields", None)
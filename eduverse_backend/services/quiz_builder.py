@@ -0,0 +1,60 @@
+"""
+Quiz authoring: insert whole quiz -> questions -> options trees in one transaction
+
+Each level is a single multi-row INSERT ... RETURNING over every quiz in the request,
+so creating one quiz or a hundred costs the same handful of round-trips. That holds on
+PostgreSQL; SQLite cannot keep a batched RETURNING in row order and gets a statement per
+row, so there the query count grows with the number of quizzes and questions.
+"""
+from sqlalchemy import insert, select
+from database import engine
+from models.lesson import Lesson
+from models.quiz import Quiz, QuizQuestion, QuizOption
+from services.quiz_cache import quiz_cache
+
+BATCHED_RETURNING = engine.dialect.name == "postgresql"
+
+
+class MissingLessonError(Exception):
+    def __init__(self, lesson_ids):
+        self.lesson_ids = sorted(lesson_ids)
+        super().__init__(f"Lesson not found: {', '.join(map(str, self.lesson_ids))}")
+
+
+def _insert_returning_ids(db, model, rows: list) -> list:
+    if not rows:
+        return []
+    # RETURNING comes back in parameter order, so ids line up with rows
+    result = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return result.scalars().all()
+
+
+def create_quizzes(db, quizzes: list) -> list:
+    """Create QuizCreate trees and commit once; returns the new quiz ids in request order"""
+    lesson_ids = {quiz.lesson_id for quiz in quizzes}
+    found = set(db.execute(select(Lesson.id).where(Lesson.id.in_(lesson_ids))).scalars())
+    if lesson_ids - found:
+        raise MissingLessonError(lesson_ids - found)
+
+    quiz_ids = _insert_returning_ids(db, Quiz, [quiz.dict(exclude={"questions"}) for quiz in quizzes])
+
+    questions = [
+        (quiz_id, question)
+        for quiz_id, quiz in zip(quiz_ids, quizzes)
+        for question in quiz.questions
+    ]
+    question_ids = _insert_returning_ids(db, QuizQuestion, [
+        {"quiz_id": quiz_id, **question.dict(exclude={"options"})} for quiz_id, question in questions
+    ])
+
+    options = [
+        {"question_id": question_id, **option.dict()}
+        for question_id, (_, question) in zip(question_ids, questions)
+        for option in question.options
+    ]
+    if options:
+        db.execute(insert(QuizOption), options)
+    db.commit()
+    # Core inserts skip the session hooks; the lessons' cached quiz lists are now stale
+    quiz_cache.invalidate(("lesson", lesson_id) for lesson_id in lesson_ids)
+    return quiz_ids
@@ -0,0 +1,196 @@
+"""
+LRU of pre-serialized quiz responses, so popular quizzes are served without the ORM
+
+Each entry is the final JSON body (plus its ETag) of GET /api/quizzes/{id} or
+/api/quizzes/lesson/{id}, built from a quiz tree loaded with selectinload in 3 queries.
+Single-quiz entries also carry the quiz's AnswerKey for grading submissions; grading
+reloads any entry older than QUIZ_ANSWER_KEY_TTL_SECONDS, so an edit or delete made on
+another worker changes how submissions are scored within seconds, not a full TTL.
+Entries carry tags for every quiz, question and lesson they were built from; committed ORM
+changes to Quiz, QuizQuestion or QuizOption drop the entries tagged with what changed.
+Bulk Core inserts call invalidate() themselves. Other workers converge within
+QUIZ_CACHE_TTL_SECONDS.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import chain
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, selectinload
+from http_cache import make_etag
+from models.quiz import Quiz, QuizQuestion, QuizOption
+from schemas.quiz import QuizResponse
+from services.quiz_grading import AnswerKey
+
+QUIZ_CACHE_SIZE = int(os.getenv("QUIZ_CACHE_SIZE", "512"))
+QUIZ_CACHE_TTL_SECONDS = float(os.getenv("QUIZ_CACHE_TTL_SECONDS", "300"))
+QUIZ_ANSWER_KEY_TTL_SECONDS = float(os.getenv("QUIZ_ANSWER_KEY_TTL_SECONDS", "5"))
+
+QuizSnapshot = namedtuple("QuizSnapshot", ["body", "etag", "tags", "loaded_at", "answer_key"])
+
+
+def load_quiz_trees(db, *criteria) -> list:
+    """Quizzes matching criteria with questions and options loaded in 3 queries"""
+    return db.execute(
+        select(Quiz)
+        .where(*criteria)
+        .options(selectinload(Quiz.questions).selectinload(QuizQuestion.options))
+        .order_by(Quiz.id)
+    ).scalars().all()
+
+
+def _tags(quizzes: list) -> set:
+    tags = set()
+    for quiz in quizzes:
+        tags.add(("quiz", quiz.id))
+        tags.update(("question", question.id) for question in quiz.questions)
+    return tags
+
+
+class QuizCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # ("quiz", id) / ("lesson", id) -> QuizSnapshot
+        self._keys_by_tag = {}  # tag -> set of entry keys
+        self.version = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.loaded_at > self.ttl:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def quiz(self, db, quiz_id: int, max_age: float = None):
+        """Snapshot of one quiz, or None if it does not exist; max_age forces a fresher load"""
+        key = ("quiz", quiz_id)
+        entry = self.get(key)
+        if entry is not None and max_age is not None and time.monotonic() - entry.loaded_at > max_age:
+            entry = None
+        if entry is None:
+            version = self.version
+            quizzes = load_quiz_trees(db, Quiz.id == quiz_id)
+            if not quizzes:
+                return None
+            body = QuizResponse.model_validate(quizzes[0]).model_dump_json().encode("utf-8")
+            entry = self._put(key, body, _tags(quizzes), version, AnswerKey(quizzes[0]))
+        return entry
+
+    async def answer_key(self, db, quiz_id: int):
+        """AnswerKey for grading (None if the quiz does not exist), at most QUIZ_ANSWER_KEY_TTL_SECONDS old"""
+        entry = self.get(("quiz", quiz_id))
+        if entry is None or time.monotonic() - entry.loaded_at > QUIZ_ANSWER_KEY_TTL_SECONDS:
+            # Loads through the AsyncSession's connection
+            entry = await db.run_sync(self.quiz, quiz_id, QUIZ_ANSWER_KEY_TTL_SECONDS)
+        return entry.answer_key if entry else None
+
+    def lesson(self, db, lesson_id: int):
+        """Snapshot of the list of quizzes of a lesson"""
+        key = ("lesson", lesson_id)
+        entry = self.get(key)
+        if entry is None:
+            version = self.version
+            quizzes = load_quiz_trees(db, Quiz.lesson_id == lesson_id)
+            body = b"[" + b",".join(
+                QuizResponse.model_validate(quiz).model_dump_json().encode("utf-8") for quiz in quizzes
+            ) + b"]"
+            entry = self._put(key, body, _tags(quizzes) | {("lesson", lesson_id)}, version)
+        return entry
+
+    def _put(self, key, body: bytes, tags: set, version: int, answer_key: AnswerKey = None) -> QuizSnapshot:
+        entry = QuizSnapshot(
+            body, make_etag(body.decode("utf-8")), frozenset(tags), time.monotonic(), answer_key
+        )
+        with self._lock:
+            # A commit that landed while this was loading may not be in it; serve but don't keep
+            if version != self.version:
+                return entry
+            self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, tags):
+        with self._lock:
+            self.version += 1
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_seconds": self.ttl,
+                "max_size": self.maxsize
+            }
+
+
+quiz_cache = QuizCache(QUIZ_CACHE_SIZE, QUIZ_CACHE_TTL_SECONDS)
+
+
+def _values(obj, attribute: str) -> set:
+    """Current and previous values of an attribute (a move affects both sides)"""
+    history = inspect(obj).attrs[attribute].history
+    return {value for value in chain(history.added, history.unchanged, history.deleted) if value is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_quiz_changes(session, flush_context):
+    tags = None
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Quiz):
+            tag_values = [("quiz", obj.id)] + [("lesson", value) for value in _values(obj, "lesson_id")]
+        elif isinstance(obj, QuizQuestion):
+            tag_values = [("question", obj.id)] + [("quiz", value) for value in _values(obj, "quiz_id")]
+        elif isinstance(obj, QuizOption):
+            tag_values = [("question", value) for value in _values(obj, "question_id")]
+        else:
+            continue
+        if tags is None:
+            tags = session.info.setdefault("quiz_cache_tags", set())
+        tags.update(tag_values)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_quizzes(session):
+    tags = session.info.pop("quiz_cache_tags", None)
+    if tags:
+        quiz_cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_quiz_changes(session):
+    session.info.pop("quiz_cache_tags", None)
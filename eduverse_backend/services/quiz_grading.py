@@ -0,0 +1,31 @@
+"""
+Answer keys for grading quiz submissions from memory
+
+An AnswerKey is built once from a loaded quiz tree (and cached with the quiz snapshot in
+quiz_cache) and maps every correct (question id, option id) pair to the question's points,
+so a submission is graded with one hashed lookup per answer and no queries.
+"""
+
+
+class AnswerKey:
+    __slots__ = ("quiz_id", "title", "passing_score", "xp_reward", "question_count", "total_points", "_correct")
+
+    def __init__(self, quiz):
+        self.quiz_id = quiz.id
+        self.title = quiz.title
+        self.passing_score = quiz.passing_score
+        self.xp_reward = quiz.xp_reward
+        self.question_count = len(quiz.questions)
+        self.total_points = sum(question.points for question in quiz.questions)
+        self._correct = {
+            (question.id, option.id): question.points
+            for question in quiz.questions
+            for option in question.options
+            if option.is_correct
+        }
+
+    def grade(self, answers: dict):
+        """(earned points, correct answers) for question id -> selected option id"""
+        # Pairs for other quizzes' questions or wrong options simply miss
+        earned = [points for points in map(self._correct.get, answers.items()) if points is not None]
+        return sum(earned), len(earned)
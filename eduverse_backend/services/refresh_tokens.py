@@ -0,0 +1,106 @@
+"""
+Refresh tokens with rotation and a compact server-side revocation store
+
+A refresh token is a signed JWT (type "refresh") carrying a unique id (jti) and a family id
+shared by every token rotated from the same login. Renewing a session is a signature check
+plus one primary-key lookup, instead of a bcrypt verify.
+
+Each refresh token is single use: rotating one records its jti in revoked_tokens. Presenting
+a jti a second time means the token leaked, so the whole family is revoked. Rows are only
+kept until the token they describe would have expired anyway.
+"""
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from jose import JWTError, jwt
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.revoked_token import RevokedToken
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# Expired revocation rows are deleted at most this often per worker
+PRUNE_INTERVAL_SECONDS = 3600
+
+_last_prune = 0.0
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is invalid, expired, reused or revoked"""
+
+
+def _family_key(family: str) -> str:
+    return f"family:{family}"
+
+
+def create_refresh_token(user_id: int, family: str = None) -> str:
+    """Issue a refresh token; pass the family of the token being rotated to keep the chain"""
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    payload = {
+        "sub": str(user_id),
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+        "exp": expire
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise RefreshTokenError("Invalid refresh token")
+    if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+        raise RefreshTokenError("Invalid refresh token")
+    return payload
+
+
+async def revoke_family(db: AsyncSession, family: str):
+    """Revoke every refresh token descended from the same login"""
+    # No token in the family can outlive one issued right now
+    expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    await db.merge(RevokedToken(jti=_family_key(family), expires_at=expires_at))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Revoked concurrently by another request
+        await db.rollback()
+
+
+async def rotate(db: AsyncSession, token: str):
+    """Consume a refresh token; returns (user_id, family) for issuing its replacement"""
+    payload = decode_refresh_token(token)
+    family = payload["fam"]
+
+    if await db.get(RevokedToken, _family_key(family)) is not None:
+        raise RefreshTokenError("Refresh token has been revoked")
+
+    # The primary key makes consuming a jti atomic, even across workers
+    db.add(RevokedToken(jti=payload["jti"], expires_at=datetime.utcfromtimestamp(payload["exp"])))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        await revoke_family(db, family)
+        raise RefreshTokenError("Refresh token reuse detected; please log in again")
+
+    await _maybe_prune(db)
+    return int(payload["sub"]), family
+
+
+async def _maybe_prune(db: AsyncSession):
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+    await db.commit()
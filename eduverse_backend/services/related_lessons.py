@@ -0,0 +1,229 @@
+"""
+Related lessons from TF-IDF cosine similarity
+
+Lesson bodies are vectorised with sublinear TF and smoothed IDF into an L2-normalised
+SciPy sparse matrix, so a block of rows times the transpose gives cosine similarities.
+The top RELATED_LESSONS_K neighbours of every lesson are stored in related_lessons:
+compute_related_lessons.py rebuilds the whole table, and content edits made through the
+ORM queue an incremental update that only recomputes the lessons whose lists can change.
+
+The incremental update re-vectorises with the current IDF but leaves untouched lists
+scored with the IDF of their last computation; the offline job evens that out.
+"""
+import logging
+import math
+import os
+import threading
+from collections import Counter
+from itertools import chain
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models.lesson import Lesson
+from models.related_lesson import RelatedLesson
+from services.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+RELATED_LESSONS_K = int(os.getenv("RELATED_LESSONS_K", "5"))
+# Edits arriving within this window are recomputed together
+RELATED_RECOMPUTE_DELAY_SECONDS = float(os.getenv("RELATED_RECOMPUTE_DELAY_SECONDS", "2"))
+
+_ROW_BLOCK = 256  # similarity rows computed per sparse product (bounds the dense block size)
+
+
+def _load_lessons(db):
+    rows = db.execute(select(Lesson.id, Lesson.content).order_by(Lesson.id)).all()
+    return [row.id for row in rows], [row.content for row in rows]
+
+
+def vectorize(contents: list):
+    """L2-normalised TF-IDF matrix (CSR), one row per document"""
+    # numpy/scipy are only loaded by the jobs that need them
+    import numpy as np
+    from scipy import sparse
+
+    vocabulary = {}
+    rows, columns, weights = [], [], []
+    for row, content in enumerate(contents):
+        for term, tf in Counter(tokenize(content)).items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            weights.append(1.0 + math.log(tf))
+    matrix = sparse.csr_matrix(
+        (np.array(weights, dtype=np.float32), (np.array(rows, dtype=np.int32), np.array(columns, dtype=np.int32))),
+        shape=(len(contents), len(vocabulary))
+    )
+    df = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + len(contents)) / (1 + df)) + 1).astype(np.float32)
+    matrix = (matrix @ sparse.diags(idf)).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def _similarity_blocks(matrix, rows: list):
+    """(row positions, dense similarity block) for rows, _ROW_BLOCK at a time"""
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), _ROW_BLOCK):
+        block = rows[start:start + _ROW_BLOCK]
+        yield block, (matrix[block] @ transposed).toarray()
+
+
+def neighbours(matrix, ids: list, rows: list, k: int = RELATED_LESSONS_K) -> dict:
+    """lesson id -> [(related id, score)] best first, for the given row positions"""
+    import numpy as np
+
+    result = {}
+    for block, scores in _similarity_blocks(matrix, rows):
+        scores[np.arange(len(block)), block] = 0.0  # a lesson is not related to itself
+        for i, row in enumerate(block):
+            row_scores = scores[i]
+            top = np.argpartition(-row_scores, k)[:k] if len(row_scores) > k else np.arange(len(row_scores))
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            result[ids[row]] = [(ids[j], float(row_scores[j])) for j in top if row_scores[j] > 0]
+    return result
+
+
+def _store(db, lists: dict):
+    rows = [
+        {"lesson_id": lesson_id, "rank": rank, "related_lesson_id": related_id, "score": score}
+        for lesson_id, related in lists.items()
+        for rank, (related_id, score) in enumerate(related, start=1)
+    ]
+    if rows:
+        db.execute(insert(RelatedLesson), rows)
+
+
+def rebuild_all(db) -> int:
+    """Recompute every lesson's neighbours; returns the number of lessons processed"""
+    ids, contents = _load_lessons(db)
+    lists = neighbours(vectorize(contents), ids, list(range(len(ids)))) if ids else {}
+    db.execute(delete(RelatedLesson))
+    _store(db, lists)
+    db.commit()
+    return len(ids)
+
+
+def update(db, lesson_ids) -> int:
+    """
+    Recompute after the given lessons were created, edited or deleted. Besides those
+    lessons, only lessons that listed one of them, or that now score one of them above
+    their current k-th neighbour, are recomputed. Returns the number of lists rewritten.
+    """
+    import numpy as np
+
+    lesson_ids = set(lesson_ids)
+    ids, contents = _load_lessons(db)
+    position = {lesson_id: row for row, lesson_id in enumerate(ids)}
+    changed = [lesson_id for lesson_id in lesson_ids if lesson_id in position]
+    removed = lesson_ids - set(changed)
+    if len(changed) * 2 > len(ids):
+        return rebuild_all(db)
+
+    current = {}
+    for row in db.execute(select(RelatedLesson).order_by(RelatedLesson.lesson_id, RelatedLesson.rank)).scalars():
+        current.setdefault(row.lesson_id, []).append((row.related_lesson_id, row.score))
+
+    matrix = vectorize(contents)
+    affected = set(changed)
+    for lesson_id, related in current.items():
+        if lesson_id in position and any(related_id in lesson_ids for related_id, _ in related):
+            affected.add(lesson_id)
+
+    if changed:
+        # Lessons whose k-th best score an edited lesson now beats (any score beats a short list)
+        threshold = np.zeros(len(ids), dtype=np.float32)
+        for lesson_id, related in current.items():
+            if lesson_id in position and len(related) >= RELATED_LESSONS_K:
+                threshold[position[lesson_id]] = related[-1][1]
+        best = np.zeros(len(ids), dtype=np.float32)
+        for block, scores in _similarity_blocks(matrix, [position[lesson_id] for lesson_id in changed]):
+            scores[np.arange(len(block)), block] = 0.0
+            best = np.maximum(best, scores.max(axis=0))
+        affected.update(ids[row] for row in np.nonzero(best > threshold)[0])
+
+    lists = neighbours(matrix, ids, sorted(position[lesson_id] for lesson_id in affected))
+    stale = affected | removed
+    if stale:
+        db.execute(delete(RelatedLesson).where(RelatedLesson.lesson_id.in_(stale)))
+    if removed:
+        db.execute(delete(RelatedLesson).where(RelatedLesson.related_lesson_id.in_(removed)))
+    _store(db, lists)
+    db.commit()
+    return len(lists)
+
+
+class RecomputeQueue:
+    """Lesson ids whose content changed, recomputed together on a background thread"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._timer = None
+        self.runs = 0
+        self.lists_rewritten = 0
+
+    def schedule(self, lesson_ids):
+        with self._lock:
+            self._pending.update(lesson_ids)
+            if self._timer is None:
+                # Daemon, so scripts that edit lessons (seeding) are not held open by it
+                self._timer = threading.Timer(self.delay, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        try:
+            db = SessionLocal()
+            try:
+                self.lists_rewritten += update(db, pending)
+                self.runs += 1
+            finally:
+                db.close()
+        except ImportError:
+            logger.warning("numpy/scipy not installed; related lessons were not recomputed")
+        except Exception:
+            logger.exception("Could not recompute related lessons for %s", sorted(pending))
+        with self._lock:
+            self._timer = None
+            more = bool(self._pending)
+        if more:
+            self.schedule(())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending_lessons": len(self._pending),
+                "scheduled": self._timer is not None,
+                "runs": self.runs,
+                "lists_rewritten": self.lists_rewritten
+            }
+
+
+recompute_queue = RecomputeQueue(RELATED_RECOMPUTE_DELAY_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_content_changes(session, flush_context):
+    changed = session.info.setdefault("related_lessons_changed", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Lesson) and (
+            obj in session.new or obj in session.deleted or inspect(obj).attrs.content.history.has_changes()
+        ):
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _schedule_recompute(session):
+    changed = session.info.pop("related_lessons_changed", None)
+    if changed:
+        recompute_queue.schedule(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_content_changes(session):
+    session.info.pop("related_lessons_changed", None)
@@ -1,22 +1,11 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-import PyPDF2
 from typing import Dict, List
 import json
-
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-else:
-    model = None
+from services import ai_gateway
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text content from PDF file"""
+    import PyPDF2  # imported on first use to keep worker startup fast
+
     try:
         with open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
@@ -30,7 +19,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
 async def analyze_resume(resume_text: str) -> Dict:
     """Analyze resume and provide recommendations"""
     
-    if not model:
+    if not ai_gateway.is_configured():
         return {
             "skills_found": [],
             "skills_missing": [],
@@ -64,8 +53,7 @@ Focus on:
 
 Provide ONLY the JSON response, no additional text."""
         
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
+        result_text = (await ai_gateway.generate(prompt)).strip()
         
         # Try to extract JSON from response
         if "```json" in result_text:
@@ -0,0 +1,227 @@
+"""
+BM25 inverted index over the course/lesson catalog, for databases without full-text search
+
+The index is built from the catalog snapshot and written to SEARCH_INDEX_PATH as one flat file:
+
+    header | document table (JSON) | vocabulary (JSON) | postings (uint32 doc, tf pairs)
+
+The file is mmap'd and postings are read in place, so a worker that starts against an
+unchanged catalog (same fingerprint) reuses the file instead of re-tokenizing every lesson.
+Postings are in native byte order; the file is a per-host cache, not an exchange format.
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from collections import Counter
+
+SEARCH_INDEX_PATH = os.getenv(
+    "SEARCH_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "search_index.bin")
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3  # a title token counts as this many body tokens
+
+_MAGIC = b"EVBM25v1"
+# magic, fingerprint, documents, terms, document table bytes, vocabulary bytes, average length
+_HEADER = struct.Struct("<8s32sIIQQd")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "how", "if", "in",
+    "into", "is", "it", "its", "of", "on", "or", "that", "the", "their", "then", "there", "these",
+    "this", "to", "was", "what", "when", "which", "with", "you", "your"
+}
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(token: str) -> str:
+    """Cheap plural folding so "loops" finds "loop" (applied to documents and queries alike)"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list:
+    return [normalize(token) for token in _TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def catalog_documents(catalog) -> list:
+    """[(kind, id, course_id, title, body)] for every searchable course and lesson"""
+    documents = []
+    for course in catalog.courses.values():
+        body = " ".join(filter(None, (course["description"], course["category"], course["difficulty"])))
+        documents.append(("course", course["id"], course["id"], course["title"], body))
+    for lesson in catalog.lessons.values():
+        documents.append(("lesson", lesson["id"], lesson["course_id"], lesson["title"], lesson["content"]))
+    return documents
+
+
+def serialize(fingerprint: str, documents: list) -> bytes:
+    postings = {}  # term -> [doc, tf, doc, tf, ...]
+    table = []
+    total_length = 0
+    for doc, (kind, doc_id, course_id, title, body) in enumerate(documents):
+        counts = Counter(tokenize(body))
+        for token in tokenize(title):
+            counts[token] += TITLE_BOOST
+        length = sum(counts.values())
+        total_length += length
+        table.append([kind, doc_id, course_id, length])
+        for term, tf in counts.items():
+            postings.setdefault(term, []).extend((doc, tf))
+
+    flat = array("I")
+    vocabulary = {}
+    for term in sorted(postings):
+        pairs = postings[term]
+        vocabulary[term] = [len(flat), len(pairs) // 2]  # offset in uint32s, document frequency
+        flat.extend(pairs)
+
+    table_bytes = json.dumps(table, separators=(",", ":")).encode("utf-8")
+    vocabulary_bytes = json.dumps(vocabulary, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(
+        _MAGIC, fingerprint.encode("ascii")[:32], len(table), len(vocabulary),
+        len(table_bytes), len(vocabulary_bytes), total_length / len(table) if table else 0.0
+    )
+    head = header + table_bytes + vocabulary_bytes
+    padding = b"\0" * (-len(head) % flat.itemsize)  # keep postings aligned for memoryview.cast
+    return head + padding + flat.tobytes()
+
+
+class BM25Index:
+    def __init__(self, buffer, source=None):
+        self._source = source  # the mmap (or bytes) backing the postings view
+        magic, fingerprint, _, _, table_size, vocabulary_size, avg_length = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("not a search index file")
+        offset = _HEADER.size
+        self.fingerprint = fingerprint.rstrip(b"\0").decode("ascii")
+        self.documents = json.loads(bytes(buffer[offset:offset + table_size]))
+        offset += table_size
+        self.vocabulary = json.loads(bytes(buffer[offset:offset + vocabulary_size]))
+        offset += vocabulary_size
+        offset += -offset % 4
+        self.postings = memoryview(buffer)[offset:].cast("I")
+        self.avg_length = avg_length or 1.0
+        # Length normalisation per document, precomputed once per load
+        self._norms = [
+            BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+            for _, _, _, length in self.documents
+        ]
+
+    @classmethod
+    def open(cls, path: str):
+        """Map an index file, or None if it is missing or unreadable"""
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return cls(mapped, mapped)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            mapped.close()
+            return None
+
+    def score(self, terms: list) -> dict:
+        """BM25 score of every document containing all terms (same AND semantics as Postgres)"""
+        entries = [self.vocabulary.get(term) for term in set(terms)]
+        if not entries or None in entries:
+            return {}
+        scores = None
+        total = len(self.documents)
+        # Rarest term first, so later (longer) posting lists only look up surviving documents
+        for offset, df in sorted(entries, key=lambda entry: entry[1]):
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            pairs = self.postings[offset:offset + 2 * df]
+            term_scores = {}
+            for i in range(0, 2 * df, 2):
+                doc, tf = pairs[i], pairs[i + 1]
+                if scores is None or doc in scores:
+                    term_scores[doc] = idf * tf * (BM25_K1 + 1) / (tf + self._norms[doc])
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc: scores[doc] + value for doc, value in term_scores.items()}
+            if not scores:
+                return {}
+        return scores
+
+
+class LocalSearchIndex:
+    """The BM25 index for the current catalog, rebuilt when the catalog content changes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = None
+        self.builds = 0
+        self.reused_files = 0
+        self.last_build_ms = None
+
+    def current(self, catalog) -> BM25Index:
+        fingerprint = catalog.etag("search-corpus", lambda: catalog_documents(catalog)).strip('"')
+        index = self._index
+        if index is not None and index.fingerprint == fingerprint:
+            return index
+        # While one request rebuilds, the others keep answering from the previous index
+        if not self._lock.acquire(blocking=index is None):
+            return index
+        try:
+            index = self._index
+            if index is not None and index.fingerprint == fingerprint:
+                return index
+            index = BM25Index.open(self.path)
+            if index is not None and index.fingerprint == fingerprint:
+                self.reused_files += 1
+            else:
+                index = self._build(fingerprint, catalog_documents(catalog))
+            # The previous index is not closed: requests may still be reading its mapping
+            self._index = index
+            return index
+        finally:
+            self._lock.release()
+
+    def _build(self, fingerprint: str, documents: list) -> BM25Index:
+        started = time.perf_counter()
+        data = serialize(fingerprint, documents)
+        # Write-then-rename so other workers never map a half-written file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path)
+            index = BM25Index.open(self.path)
+        except OSError:
+            logger.warning("Could not write search index to %s; keeping it in memory", self.path)
+            index = None
+        if index is None:
+            index = BM25Index(data, data)
+        self.builds += 1
+        self.last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+        return index
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "path": self.path,
+            "loaded": index is not None,
+            "documents": len(index.documents) if index else 0,
+            "terms": len(index.vocabulary) if index else 0,
+            "builds": self.builds,
+            "reused_files": self.reused_files,
+            "last_build_ms": self.last_build_ms
+        }
+
+
+local_index = LocalSearchIndex(SEARCH_INDEX_PATH)
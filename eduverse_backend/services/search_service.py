@@ -0,0 +1,195 @@
+"""
+Catalog search: ranked course/lesson hits with highlighted snippets and facet counts
+
+On PostgreSQL the matching and ranking run against the GIN-indexed tsvector documents in
+models/search.py; elsewhere (or with SEARCH_ENGINE=bm25) they run against the local BM25
+index. Titles, snippets and facets are filled in from the catalog cache either way, so a
+search costs at most two queries.
+
+Facet counts cover every match of the query text and type, ignoring the category and
+difficulty filters, so the UI can still show the other values while a filter is active.
+"""
+import heapq
+import html
+import os
+import re
+import time
+from collections import Counter
+from operator import itemgetter
+from sqlalchemy import desc, func, literal, select, union_all
+from database import read_engine
+from models.course import Course
+from models.lesson import Lesson
+from models.search import COURSE_SEARCH_DOCUMENT, LESSON_SEARCH_DOCUMENT, search_query, matches
+from services.search_index import local_index, tokenize
+
+SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "auto").lower()  # auto | postgres | bm25
+
+SNIPPET_CHARS = 200
+_MARKUP = re.compile(r"[#*`>|\[]+|\](\([^)]*\))?")  # markdown punctuation and link targets
+
+
+def engine_name() -> str:
+    if SEARCH_ENGINE in ("postgres", "bm25"):
+        return SEARCH_ENGINE
+    return "postgres" if read_engine.dialect.name == "postgresql" else "bm25"
+
+
+def highlight(text: str, pattern, length: int = SNIPPET_CHARS) -> str:
+    """Escaped plain-text excerpt around the first match, with matches wrapped in <mark>"""
+    raw = text or ""
+    match = pattern.search(raw) if pattern else None
+    # Only clean up the neighbourhood of the match, not the whole lesson
+    offset = max(0, match.start() - length) if match else 0
+    truncated = offset + 3 * length < len(raw)
+    text = " ".join(_MARKUP.sub(" ", raw[offset:offset + 3 * length]).split())
+
+    match = pattern.search(text) if pattern else None
+    start = max(0, match.start() - length // 4) if match else 0
+    if start:
+        start = text.find(" ", start) + 1 or start
+    end = min(len(text), start + length)
+    if end < len(text):
+        cut = text.rfind(" ", start, end)
+        if cut > start:
+            end = cut
+    window = text[start:end]
+
+    parts, position = [], 0
+    for found in pattern.finditer(window) if pattern else ():
+        parts.append(html.escape(window[position:found.start()]))
+        parts.append(f"<mark>{html.escape(found.group())}</mark>")
+        position = found.end()
+    parts.append(html.escape(window[position:]))
+    prefix = "…" if offset or start else ""
+    suffix = "…" if truncated or end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+def _term_pattern(terms):
+    if not terms:
+        return None
+    alternatives = "|".join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\w*", re.IGNORECASE)
+
+
+def _postgres_matches(q: str, kind):
+    query = search_query(q)
+    parts = []
+    if kind in (None, "course"):
+        parts.append(
+            select(
+                literal("course").label("kind"), Course.id.label("id"), Course.id.label("course_id"),
+                func.ts_rank_cd(COURSE_SEARCH_DOCUMENT, query).label("score")
+            ).where(matches(COURSE_SEARCH_DOCUMENT, query))
+        )
+    if kind in (None, "lesson"):
+        parts.append(
+            select(
+                literal("lesson").label("kind"), Lesson.id.label("id"), Lesson.course_id.label("course_id"),
+                func.ts_rank_cd(LESSON_SEARCH_DOCUMENT, query).label("score")
+            ).where(matches(LESSON_SEARCH_DOCUMENT, query))
+        )
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+
+
+def _postgres_search(db, q, kind, category, difficulty, limit):
+    """(ranked page of (kind, id, course_id, score), total, category counts, difficulty counts)"""
+    found = _postgres_matches(q, kind)
+    joined = found.join(Course, Course.id == found.c.course_id)
+
+    page = select(
+        found.c.kind, found.c.id, found.c.course_id, found.c.score, func.count().over().label("total")
+    ).select_from(joined)
+    if category:
+        page = page.where(Course.category == category)
+    if difficulty:
+        page = page.where(Course.difficulty == difficulty)
+    rows = db.execute(page.order_by(desc(found.c.score), found.c.kind, found.c.id).limit(limit)).all()
+
+    facet_rows = db.execute(
+        select(
+            Course.category, Course.difficulty, func.grouping(Course.category).label("by_difficulty"), func.count()
+        ).select_from(joined).group_by(func.grouping_sets(Course.category, Course.difficulty))
+    ).all()
+    categories, difficulties = Counter(), Counter()
+    for category_value, difficulty_value, by_difficulty, count in facet_rows:
+        if by_difficulty:
+            difficulties[difficulty_value] = count
+        else:
+            categories[category_value] = count
+
+    total = rows[0].total if rows else 0
+    return [tuple(row[:4]) for row in rows], total, categories, difficulties
+
+
+def _bm25_search(catalog, q, kind, category, difficulty, limit):
+    index = local_index.current(catalog)
+    documents = index.documents
+    scores = index.score(tokenize(q))
+    if kind:
+        scores = {doc: score for doc, score in scores.items() if documents[doc][0] == kind}
+
+    # Facets and filters only depend on the course, so count per course first
+    per_course = Counter(documents[doc][2] for doc in scores)
+    categories, difficulties = Counter(), Counter()
+    selected_courses = set()
+    for course_id, count in per_course.items():
+        course = catalog.courses.get(course_id)
+        if course is None:
+            continue
+        categories[course["category"]] += count
+        difficulties[course["difficulty"]] += count
+        if (not category or course["category"] == category) and (not difficulty or course["difficulty"] == difficulty):
+            selected_courses.add(course_id)
+
+    if len(selected_courses) < len(per_course):
+        scores = {doc: score for doc, score in scores.items() if documents[doc][2] in selected_courses}
+    top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+    page = [(documents[doc][0], documents[doc][1], documents[doc][2], score) for doc, score in top]
+    return page, len(scores), categories, difficulties
+
+
+def _facet_list(counts: Counter) -> list:
+    return [
+        {"value": value, "count": count}
+        for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0] or ""))
+        if value is not None
+    ]
+
+
+def search(db, catalog, q: str, kind=None, category=None, difficulty=None, limit: int = 20) -> dict:
+    started = time.perf_counter()
+    engine = engine_name()
+    if engine == "postgres":
+        page, total, categories, difficulties = _postgres_search(db, q, kind, category, difficulty, limit)
+    else:
+        page, total, categories, difficulties = _bm25_search(catalog, q, kind, category, difficulty, limit)
+
+    pattern = _term_pattern(tokenize(q))
+    hits = []
+    for hit_kind, hit_id, course_id, score in page:
+        course = catalog.courses.get(course_id)
+        record = catalog.courses.get(hit_id) if hit_kind == "course" else catalog.lessons.get(hit_id)
+        if record is None or course is None:
+            continue  # changed since this worker's catalog snapshot; it will show after the reload
+        body = record["description"] if hit_kind == "course" else record["content"]
+        hits.append({
+            "type": hit_kind,
+            "id": hit_id,
+            "course_id": course_id,
+            "title": record["title"],
+            "category": course["category"],
+            "difficulty": course["difficulty"],
+            "score": round(float(score), 4),
+            "snippet": highlight(body, pattern)
+        })
+
+    return {
+        "query": q,
+        "engine": engine,
+        "total": total,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "hits": hits,
+        "facets": {"category": _facet_list(categories), "difficulty": _facet_list(difficulties)}
+    }
@@ -0,0 +1,133 @@
+"""
+Prefix autocomplete over course and lesson titles
+
+Every word position of every title becomes a key ("intro to python", "to python", "python")
+in one sorted list, so any word of a title can be completed with a bisect plus a scan of
+the matching range. Matches are ranked by popularity: enrolments for courses, students
+with progress for lessons. The index is rebuilt whenever the catalog snapshot changes,
+which also refreshes popularity every CATALOG_CACHE_TTL_SECONDS.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import func, select
+from database import ReadSessionLocal
+from models.progress import Progress, LessonProgress
+
+SUGGEST_LIMIT = 8
+# Short prefixes match large ranges, so their top results are memoised per index
+_MEMO_PREFIX_LENGTH = 3
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+class SuggestIndex:
+    def __init__(self, entries: list):
+        # entries: [(type, id, course_id, title, popularity)]
+        self.entries = entries
+        keys = []
+        for position, (_, _, _, title, popularity) in enumerate(entries):
+            words = normalize(title).split(" ")
+            for start in range(len(words)):
+                # Sort key ends with the rank so equal keys come out most popular first
+                keys.append((" ".join(words[start:]), start > 0, -popularity, position))
+        keys.sort()
+        self._keys = [key[0] for key in keys]
+        self._rank = [key[1:] for key in keys]
+        self.key_count = len(keys)
+        self._memo = {}
+
+    def lookup(self, prefix: str, limit: int = SUGGEST_LIMIT) -> list:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        memoised = len(prefix) <= _MEMO_PREFIX_LENGTH and limit <= SUGGEST_LIMIT
+        if memoised and prefix in self._memo:
+            return self._memo[prefix][:limit]
+
+        low = bisect_left(self._keys, prefix)
+        high = bisect_left(self._keys, prefix + "\uffff", low)
+        # Title-start matches first, then popularity; each title once
+        best = {}
+        for starts_later, negative_popularity, position in self._rank[low:high]:
+            if position not in best:
+                best[position] = (starts_later, negative_popularity, position)
+        ranked = heapq.nsmallest(SUGGEST_LIMIT if memoised else limit, best.values())
+        results = [self._entry(position) for _, _, position in ranked]
+        if memoised:
+            self._memo[prefix] = results
+        return results[:limit]
+
+    def _entry(self, position: int) -> dict:
+        kind, entry_id, course_id, title, popularity = self.entries[position]
+        return {"type": kind, "id": entry_id, "course_id": course_id, "title": title, "popularity": popularity}
+
+
+def _load_popularity():
+    db = ReadSessionLocal()
+    try:
+        courses = dict(db.execute(select(Progress.course_id, func.count()).group_by(Progress.course_id)).all())
+        lessons = dict(db.execute(
+            select(LessonProgress.lesson_id, func.count()).group_by(LessonProgress.lesson_id)
+        ).all())
+    finally:
+        db.close()
+    return courses, lessons
+
+
+class TitleSuggester:
+    """SuggestIndex for the current catalog snapshot"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._index = None
+        self.builds = 0
+        self.last_build_ms = None
+
+    def fresh(self, catalog):
+        """Index for this snapshot if it is already built, else None"""
+        if self._snapshot is catalog:
+            return self._index
+        return None
+
+    def current(self, catalog) -> SuggestIndex:
+        index = self.fresh(catalog)
+        if index is not None:
+            return index
+        with self._lock:
+            if self._snapshot is catalog:
+                return self._index
+            started = time.perf_counter()
+            course_popularity, lesson_popularity = _load_popularity()
+            entries = [
+                ("course", course["id"], course["id"], course["title"], course_popularity.get(course["id"], 0))
+                for course in catalog.courses.values()
+            ]
+            entries.extend(
+                ("lesson", lesson["id"], lesson["course_id"], lesson["title"], lesson_popularity.get(lesson["id"], 0))
+                for lesson in catalog.lessons.values()
+            )
+            self._index = SuggestIndex(entries)
+            self._snapshot = catalog
+            self.builds += 1
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 1)
+            return self._index
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "titles": len(index.entries) if index else 0,
+            "keys": index.key_count if index else 0,
+            "builds": self.builds,
+            "last_build_ms": self.last_build_ms
+        }
+
+
+title_suggester = TitleSuggester()
@@ -0,0 +1,181 @@
+"""
+Bulk user provisioning for whole cohorts
+
+Rows arrive as CSV (header: username,email,password,full_name) or NDJSON, one record per
+line. They are processed in batches: one set-based query checks uniqueness for the whole
+batch, passwords are hashed in parallel on the password-hashing process pool, and the new
+users go in with a single multi-row INSERT ... RETURNING. A result line is yielded per row.
+"""
+import asyncio
+import codecs
+import csv
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from database import AsyncSessionLocal
+from models.user import User
+from schemas.user_schema import UserCreate
+from services import password_service
+from services.availability import availability_index
+
+PROVISION_BATCH_SIZE = 500
+
+
+def iter_lines(chunks):
+    """Split byte chunks into decoded lines"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+
+def iter_records(lines, is_csv: bool):
+    """Yield (row number, dict or error message) for every non-empty line"""
+    header = None
+    row = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        if is_csv and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        row += 1
+        try:
+            if is_csv:
+                values = next(csv.reader([line]))
+                record = {key: value for key, value in zip(header, values) if value != ""}
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+        except (ValueError, csv.Error) as e:
+            yield row, f"Malformed row: {e}"
+            continue
+        yield row, record
+
+
+def _result(row: int, user: UserCreate = None, **fields) -> dict:
+    result = {"row": row}
+    if user is not None:
+        result["username"] = user.username
+    result.update(fields)
+    return result
+
+
+async def _existing(db, users):
+    """Usernames and emails of the batch that are already taken, in one query"""
+    usernames = {user.username for user in users}
+    emails = {user.email for user in users}
+    rows = await db.execute(
+        select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+    )
+    taken_usernames, taken_emails = set(), set()
+    for username, email in rows:
+        if username in usernames:
+            taken_usernames.add(username)
+        if email in emails:
+            taken_emails.add(email)
+    return taken_usernames, taken_emails
+
+
+async def _insert_one_by_one(db, pending):
+    """Fallback when a batch collides with a concurrent registration"""
+    results = []
+    for row, user, values in pending:
+        try:
+            new_id = (await db.execute(insert(User).returning(User.id), [values])).scalar_one()
+            await db.commit()
+            results.append(_result(row, user, status="created", id=new_id))
+            availability_index.add(user.username, user.email)
+        except IntegrityError:
+            await db.rollback()
+            results.append(_result(row, user, status="error", error="Username or email already registered"))
+    return results
+
+
+async def _provision_batch(db, batch, seen_usernames: set, seen_emails: set):
+    results = {}
+    valid = []
+    for row, record in batch:
+        if isinstance(record, str):
+            results[row] = _result(row, status="error", error=record)
+            continue
+        try:
+            valid.append((row, UserCreate(**record)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results[row] = _result(row, status="error", error=f"{field}: {error['msg']}")
+
+    taken_usernames, taken_emails = await _existing(db, [user for _, user in valid]) if valid else (set(), set())
+
+    accepted = []
+    for row, user in valid:
+        if user.username in taken_usernames or user.username in seen_usernames:
+            results[row] = _result(row, user, status="error", error="Username already registered")
+        elif user.email in taken_emails or user.email in seen_emails:
+            results[row] = _result(row, user, status="error", error="Email already registered")
+        else:
+            seen_usernames.add(user.username)
+            seen_emails.add(user.email)
+            accepted.append((row, user))
+
+    if accepted:
+        hashes = await asyncio.gather(*(password_service.hash_password(user.password) for _, user in accepted))
+        pending = [
+            (row, user, {
+                "username": user.username,
+                "email": user.email,
+                "hashed_password": hashed_password,
+                "full_name": user.full_name
+            })
+            for (row, user), hashed_password in zip(accepted, hashes)
+        ]
+        try:
+            created = await db.execute(
+                insert(User).returning(User.id, User.username),
+                [values for _, _, values in pending]
+            )
+            ids = {username: user_id for user_id, username in created}
+            await db.commit()
+            for row, user, _ in pending:
+                results[row] = _result(row, user, status="created", id=ids[user.username])
+                availability_index.add(user.username, user.email)
+        except IntegrityError:
+            await db.rollback()
+            for result in await _insert_one_by_one(db, pending):
+                results[result["row"]] = result
+
+    return [results[row] for row, _ in batch]
+
+
+async def provision_users(chunks, is_csv: bool):
+    """Create users from uploaded byte chunks; yields one NDJSON result line per row plus a summary"""
+    summary = {"created": 0, "failed": 0}
+    seen_usernames, seen_emails = set(), set()
+
+    async def flush(db, batch):
+        lines = []
+        for result in await _provision_batch(db, batch, seen_usernames, seen_emails):
+            summary["created" if result["status"] == "created" else "failed"] += 1
+            lines.append(json.dumps(result) + "\n")
+        return "".join(lines)
+
+    async with AsyncSessionLocal() as db:
+        batch = []
+        for record in iter_records(iter_lines(chunks), is_csv):
+            batch.append(record)
+            if len(batch) >= PROVISION_BATCH_SIZE:
+                yield await flush(db, batch)
+                batch = []
+        if batch:
+            yield await flush(db, batch)
+
+    yield json.dumps({"summary": summary}) + "\n"
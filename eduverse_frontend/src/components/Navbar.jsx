@@ -1,5 +1,6 @@
 import { Link, useNavigate } from "react-router-dom";
 import { useAuthStore } from "../store/authStore";
+import api from "../services/api";
 import { FaUser, FaTrophy, FaBook, FaHome, FaSignOutAlt, FaGamepad, FaFileAlt, FaComments } from "react-icons/fa";
 
 const Navbar = () => {
@@ -7,6 +8,11 @@ const Navbar = () => {
   const navigate = useNavigate();
 
   const handleLogout = () => {
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) {
+      // Revoke server-side; logging out locally doesn't wait for it
+      api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => {});
+    }
     logout();
     navigate("/");
   };
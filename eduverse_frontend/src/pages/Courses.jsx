@@ -1,13 +1,17 @@
 import React, { useEffect, useState } from "react";
 import api from "../services/api";
 import { Link, useNavigate } from "react-router-dom";
-import { FaClock, FaStar, FaTrophy, FaClipboardCheck } from "react-icons/fa";
+import { FaClock, FaStar, FaTrophy, FaClipboardCheck, FaSearch } from "react-icons/fa";
 import { useAuthStore } from "../store/authStore";
 
 const Courses = () => {
   const [courses, setCourses] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
+  const [query, setQuery] = useState('');
+  const [category, setCategory] = useState(null);
+  const [results, setResults] = useState(null);
+  const [suggestions, setSuggestions] = useState([]);
   const { user } = useAuthStore();
   const navigate = useNavigate();
 
@@ -26,6 +30,44 @@ const Courses = () => {
     }
   };
 
+  // Title suggestions while typing (cheap prefix lookups, so a short debounce is enough)
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const res = await api.get("/search/suggest", { params: { q } });
+        setSuggestions(res.data.suggestions);
+      } catch (err) {
+        console.error(err);
+      }
+    }, 80);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  // Debounced catalog search; the difficulty buttons and category chips narrow it
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const params = { q, category: category || undefined };
+        if (filter !== 'all') params.difficulty = filter.charAt(0).toUpperCase() + filter.slice(1);
+        const res = await api.get("/search", { params });
+        setResults(res.data);
+      } catch (err) {
+        console.error(err);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [query, filter, category]);
+
   const getDifficultyColor = (difficulty) => {
     switch(difficulty?.toLowerCase()) {
       case 'beginner': return 'bg-green-100 text-green-800 dark:bg-green-900 dark:text-green-200';
@@ -60,6 +102,34 @@ const Courses = () => {
           </p>
         </div>
 
+        {/* Search */}
+        <div className="max-w-2xl mx-auto mb-6 relative">
+          <FaSearch className="absolute left-4 top-1/2 -translate-y-1/2 text-gray-400" />
+          <input
+            type="search"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Search courses and lessons..."
+            onBlur={() => setTimeout(() => setSuggestions([]), 150)}
+            className="w-full pl-12 pr-4 py-3 rounded-full bg-white dark:bg-gray-800 text-gray-800 dark:text-white shadow-md focus:outline-none focus:ring-2 focus:ring-purple-500"
+          />
+          {suggestions.length > 0 && (
+            <ul className="absolute z-10 left-0 right-0 mt-2 bg-white dark:bg-gray-800 rounded-xl shadow-lg overflow-hidden">
+              {suggestions.map((suggestion) => (
+                <li key={`${suggestion.type}-${suggestion.id}`}>
+                  <button
+                    onMouseDown={() => navigate(suggestion.type === 'lesson' ? `/lesson/${suggestion.id}` : `/lessons/${suggestion.id}`)}
+                    className="w-full text-left px-4 py-2 hover:bg-purple-50 dark:hover:bg-gray-700 text-gray-800 dark:text-white"
+                  >
+                    <span className="text-xs uppercase font-semibold text-purple-600 dark:text-purple-400 mr-2">{suggestion.type}</span>
+                    {suggestion.title}
+                  </button>
+                </li>
+              ))}
+            </ul>
+          )}
+        </div>
+
         {/* Filter Buttons */}
         <div className="flex justify-center gap-4 mb-8 flex-wrap">
           {['all', 'beginner', 'intermediate', 'advanced'].map((level) => (
@@ -77,6 +147,49 @@ const Courses = () => {
           ))}
         </div>
 
+        {/* Search Results */}
+        {results && (
+          <div className="max-w-4xl mx-auto mb-10">
+            <div className="flex flex-wrap items-center gap-2 mb-4 text-sm">
+              <span className="text-gray-600 dark:text-gray-300">
+                {results.total} result{results.total === 1 ? '' : 's'}
+              </span>
+              {results.facets.category.map((facet) => (
+                <button
+                  key={facet.value}
+                  onClick={() => setCategory(category === facet.value ? null : facet.value)}
+                  className={`px-3 py-1 rounded-full font-semibold ${
+                    category === facet.value
+                      ? 'bg-purple-600 text-white'
+                      : 'bg-white dark:bg-gray-800 text-gray-700 dark:text-gray-300'
+                  }`}
+                >
+                  {facet.value} ({facet.count})
+                </button>
+              ))}
+            </div>
+            <div className="space-y-3">
+              {results.hits.map((hit) => (
+                <Link
+                  key={`${hit.type}-${hit.id}`}
+                  to={hit.type === 'lesson' ? `/lesson/${hit.id}` : `/lessons/${hit.id}`}
+                  className="block bg-white dark:bg-gray-800 rounded-xl shadow p-4 hover:shadow-lg transition-all"
+                >
+                  <div className="flex items-center gap-2 mb-1">
+                    <span className="text-xs uppercase font-semibold text-purple-600 dark:text-purple-400">{hit.type}</span>
+                    <span className="font-bold text-gray-800 dark:text-white">{hit.title}</span>
+                  </div>
+                  {/* Snippets are HTML-escaped by the API, with matches wrapped in <mark> */}
+                  <p
+                    className="text-sm text-gray-600 dark:text-gray-300"
+                    dangerouslySetInnerHTML={{ __html: hit.snippet }}
+                  />
+                </Link>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Courses Grid */}
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
           {filteredCourses.map((course) => (
@@ -8,24 +8,38 @@ const LessonDetail = () => {
   const { lessonId } = useParams();
   const navigate = useNavigate();
   const [lesson, setLesson] = useState(null);
+  const [lessonHtml, setLessonHtml] = useState(null);
   const [quizzes, setQuizzes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [completing, setCompleting] = useState(false);
   const [aiSummary, setAiSummary] = useState(null);
   const [generatingSummary, setGeneratingSummary] = useState(false);
   const [showSummary, setShowSummary] = useState(false);
+  const [related, setRelated] = useState([]);
 
   useEffect(() => {
+    setRelated([]);
     fetchLessonData();
   }, [lessonId]);
 
   const fetchLessonData = async () => {
     try {
-      const [lessonRes, quizzesRes] = await Promise.all([
-        api.get(`/lessons/${lessonId}`),
+      // Lesson details without the markdown body; the body comes pre-rendered (and
+      // pre-compressed) from /rendered, and the markdown is only fetched if that fails
+      const [lessonRes, quizzesRes, html] = await Promise.all([
+        api.get(`/lessons/${lessonId}`, { params: { include_content: false } }),
         api.get(`/quizzes/lesson/${lessonId}`),
+        api
+          .get(`/lessons/${lessonId}/rendered`, { responseType: "text" })
+          .then((res) => res.data)
+          .catch(() => null),
       ]);
+      if (html === null) {
+        const fullRes = await api.get(`/lessons/${lessonId}`);
+        lessonRes.data.content = fullRes.data.content;
+      }
       setLesson(lessonRes.data);
+      setLessonHtml(html);
       setQuizzes(quizzesRes.data);
       
       // Check if AI summary already exists
@@ -62,6 +76,11 @@ const LessonDetail = () => {
         time_spent_minutes: 30,
       });
       alert(`Lesson completed! You earned ${lesson.xp_reward} XP! 🎉`);
+      // Suggest what to read next
+      api
+        .get(`/lessons/${lessonId}/related`)
+        .then((res) => setRelated(res.data))
+        .catch((err) => console.error(err));
     } catch (err) {
       console.error(err);
       alert("Failed to complete lesson");
@@ -115,7 +134,11 @@ const LessonDetail = () => {
         {/* Lesson Content */}
         <div className="bg-white dark:bg-gray-800 rounded-2xl shadow-xl p-8 mb-6">
           <div className="prose dark:prose-invert max-w-none">
-            <ReactMarkdown>{lesson?.content || "No content available"}</ReactMarkdown>
+            {lessonHtml ? (
+              <div dangerouslySetInnerHTML={{ __html: lessonHtml }} />
+            ) : (
+              <ReactMarkdown>{lesson?.content || "No content available"}</ReactMarkdown>
+            )}
           </div>
         </div>
 
@@ -173,6 +196,29 @@ const LessonDetail = () => {
           )}
         </button>
 
+        {/* Related Lessons (shown once the lesson is completed) */}
+        {related.length > 0 && (
+          <div className="bg-white dark:bg-gray-800 rounded-2xl shadow-xl p-6 mb-6">
+            <h2 className="text-2xl font-bold text-gray-800 dark:text-white mb-4">
+              📖 Up Next: Related Lessons
+            </h2>
+            <div className="space-y-3">
+              {related.map((item) => (
+                <button
+                  key={item.id}
+                  onClick={() => navigate(`/lesson/${item.id}`)}
+                  className="w-full text-left p-4 rounded-xl bg-gray-50 dark:bg-gray-700 hover:shadow-lg transition-all"
+                >
+                  <h3 className="font-bold text-gray-800 dark:text-white">{item.title}</h3>
+                  <p className="text-sm text-gray-600 dark:text-gray-300">
+                    {item.course_title} · +{item.xp_reward} XP
+                  </p>
+                </button>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Quizzes */}
         {quizzes.length > 0 && (
           <div className="bg-white dark:bg-gray-800 rounded-2xl shadow-xl p-6">
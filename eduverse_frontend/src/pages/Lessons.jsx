@@ -17,7 +17,7 @@ const Lessons = () => {
     try {
       const [courseRes, lessonsRes] = await Promise.all([
         api.get(`/courses/${courseId}`),
-        api.get(`/lessons/course/${courseId}`),
+        api.get(`/lessons/course/${courseId}/outline`),
       ]);
       setCourse(courseRes.data);
       setLessons(lessonsRes.data);
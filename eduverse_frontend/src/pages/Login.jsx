@@ -18,7 +18,7 @@ const Login = () => {
 
     try {
       const res = await api.post("/auth/login", formData);
-      setAuth(res.data.user, res.data.access_token);
+      setAuth(res.data.user, res.data.access_token, res.data.refresh_token);
       navigate("/dashboard");
     } catch (err) {
       setError(err.response?.data?.detail || "Login failed. Please try again.");
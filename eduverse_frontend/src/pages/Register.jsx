@@ -23,7 +23,7 @@ const Register = () => {
 
     try {
       const res = await api.post("/auth/register", formData);
-      setAuth(res.data.user, res.data.access_token);
+      setAuth(res.data.user, res.data.access_token, res.data.refresh_token);
       navigate("/dashboard");
     } catch (err) {
       setError(err.response?.data?.detail || "Registration failed. Please try again.");
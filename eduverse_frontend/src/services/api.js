@@ -1,4 +1,5 @@
 import axios from "axios";
+import { useAuthStore } from "../store/authStore";
 
 const api = axios.create({
   baseURL: "http://localhost:8000/api",
@@ -7,6 +8,10 @@ const api = axios.create({
   },
 });
 
+// Read-your-writes: after a write the API hands back a short-lived signed token that keeps
+// this user's reads on the primary database, whichever server worker they reach
+const READ_PRIMARY_HEADER = "X-Read-Primary";
+
 // Add token to requests
 api.interceptors.request.use(
   (config) => {
@@ -14,6 +19,10 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    const readPrimary = sessionStorage.getItem("read_primary");
+    if (readPrimary) {
+      config.headers[READ_PRIMARY_HEADER] = readPrimary;
+    }
     return config;
   },
   (error) => {
@@ -21,12 +30,54 @@ api.interceptors.request.use(
   }
 );
 
-// Handle response errors
+// Endpoints whose 401 means bad credentials, not an expired session
+const AUTH_ENDPOINTS = ["/auth/login", "/auth/register", "/auth/refresh", "/auth/logout"];
+
+// Concurrent 401s share one refresh request
+let refreshPromise = null;
+
+const refreshSession = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem("refresh_token");
+    refreshPromise = (refreshToken
+      ? axios.post(`${api.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error("No refresh token"))
+    )
+      .then((res) => {
+        useAuthStore.getState().setAuth(res.data.user, res.data.access_token, res.data.refresh_token);
+        return res.data.access_token;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
+// Handle responses (read-your-writes token) and errors
 api.interceptors.response.use(
-  (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      localStorage.removeItem("token");
+  (response) => {
+    const readPrimary = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+    if (readPrimary) {
+      sessionStorage.setItem("read_primary", readPrimary);
+    }
+    return response;
+  },
+  async (error) => {
+    const original = error.config;
+    const isAuthCall = AUTH_ENDPOINTS.includes(original?.url);
+    if (error.response?.status === 401 && original && !original._retried && !isAuthCall) {
+      original._retried = true;
+      try {
+        const token = await refreshSession();
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch (refreshError) {
+        // Refresh failed, fall through to logging out
+      }
+    }
+    if (error.response?.status === 401 && !isAuthCall) {
+      useAuthStore.getState().logout();
       window.location.href = "/login";
     }
     return Promise.reject(error);
@@ -6,12 +6,16 @@ export const useAuthStore = create(
     (set) => ({
       user: null,
       token: null,
-      setAuth: (user, token) => {
+      setAuth: (user, token, refreshToken) => {
         localStorage.setItem('token', token);
+        if (refreshToken) {
+          localStorage.setItem('refresh_token', refreshToken);
+        }
         set({ user, token });
       },
       logout: () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         set({ user: null, token: null });
       },
       updateUser: (userData) => set((state) => ({ 
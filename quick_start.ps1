@@ -29,6 +29,7 @@ Write-Host '========================================' -ForegroundColor Green
 Write-Host ''
 Write-Host 'API Documentation: http://localhost:8000/docs' -ForegroundColor Cyan
 Write-Host ''
+python create_tables.py
 uvicorn main:app --reload --host 0.0.0.0 --port 8000
 "@
 
@@ -5,7 +5,7 @@ Write-Host "========================================" -ForegroundColor Cyan
 
 # Start Backend
 Write-Host "`nStarting Backend Server..." -ForegroundColor Yellow
-Start-Process powershell -ArgumentList "-NoExit", "-Command", "Set-Location 'C:\Users\Ashwithaa SK\Desktop\EduVerse\eduverse_backend'; Write-Host 'Backend Server Starting...' -ForegroundColor Green; uvicorn main:app --reload --host 0.0.0.0 --port 8000"
+Start-Process powershell -ArgumentList "-NoExit", "-Command", "Set-Location 'C:\Users\Ashwithaa SK\Desktop\EduVerse\eduverse_backend'; Write-Host 'Backend Server Starting...' -ForegroundColor Green; python create_tables.py; uvicorn main:app --reload --host 0.0.0.0 --port 8000"
 
 # Wait a bit for backend to start
 Start-Sleep -Seconds 3